@@ -0,0 +1,170 @@
+import hashlib
+import os
+import shutil
+from typing import BinaryIO, Callable, List, Optional, Tuple
+
+from .metrics import storage_op
+from .utils import ensure_dir, file_lock, uid
+
+
+class BlobWriter:
+    """A blob being written: bytes are checksummed and counted on their way to a temp file.
+
+    ``commit`` moves the finished file into place under its digest; ``abort``
+    throws it away.
+    """
+
+    def __init__(self, store: 'BlobStore'):
+        self._store = store
+        self.tmp_path = store.temp_path()
+        self._f: BinaryIO = open(self.tmp_path, 'wb')
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.hasher.update(data)
+        self.size += len(data)
+        return self._f.write(data)
+
+    def write_chunks(self, chunks: List[bytes]) -> int:
+        """Write a run of received chunks as one recorded ``blob_write``."""
+        with storage_op('blob_write', self._store.directory) as op:
+            for chunk in chunks:
+                self.write(chunk)
+            op.bytes = sum(len(chunk) for chunk in chunks)
+        return op.bytes
+
+    def commit(self, link_to: Optional[str] = None) -> Tuple[str, int]:
+        self._f.close()
+        sha256 = self.hasher.hexdigest()
+        self._store.commit(self.tmp_path, sha256, link_to)
+        return sha256, self.size
+
+    def abort(self):
+        self._f.close()
+        try:
+            os.remove(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+class BlobStore:
+    """Content-addressed file store keyed by SHA-256.
+
+    Each distinct payload is stored once under ``<dir>/<aa>/<sha256>``. Case
+    upload paths are hard links to the blob, so the ``/uploads`` static mount
+    keeps serving them and repeated documents use no extra disk. Blobs are
+    reference-counted by the ``sha256`` column of documents.csv; callers
+    release a blob once no document row refers to it.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.tmp_dir = os.path.join(directory, 'tmp')
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.directory, sha256[:2], sha256)
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self.path_for(sha256))
+
+    def temp_path(self) -> str:
+        ensure_dir(self.tmp_dir)
+        return os.path.join(self.tmp_dir, uid('blob') + '.part')
+
+    def _locked(self, sha256: str):
+        # blobs share 256 lock files by digest prefix instead of leaving one behind per blob
+        return file_lock(os.path.join(self.directory, 'locks', sha256[:2]))
+
+    def commit(self, tmp_path: str, sha256: str, link_to: Optional[str] = None) -> str:
+        """Move a fully written temp file into place as blob ``sha256``; duplicates are dropped.
+
+        With ``link_to`` the blob is also linked there before the blob's lock
+        is released, so a concurrent ``release`` cannot remove it in between.
+        """
+        path = self.path_for(sha256)
+        with self._locked(sha256):
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                ensure_dir(os.path.dirname(path))
+                # blobs are shared through hard links, so they must never be edited in place
+                os.chmod(tmp_path, 0o444)
+                os.replace(tmp_path, path)
+            if link_to is not None:
+                self._link(path, link_to)
+        return path
+
+    def put_bytes(self, data: bytes, link_to: Optional[str] = None) -> Tuple[str, int]:
+        sha256 = hashlib.sha256(data).hexdigest()
+        # the digest is known up front, so a repeat payload is only linked, never written again
+        with self._locked(sha256):
+            if self.exists(sha256):
+                if link_to is not None:
+                    self._link(self.path_for(sha256), link_to)
+                return sha256, len(data)
+            with storage_op('blob_write', self.directory) as op:
+                tmp_path = self.temp_path()
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                self.commit(tmp_path, sha256, link_to)
+                op.bytes = len(data)
+                op.rows = 1
+        return sha256, len(data)
+
+    def writer(self) -> BlobWriter:
+        """Start a blob whose content arrives in pieces; the caller commits or aborts it."""
+        return BlobWriter(self)
+
+    def put_stream(self, write: Callable[[BinaryIO], None], link_to: Optional[str] = None) -> Tuple[str, int]:
+        """Store whatever ``write`` writes to the file object it is given, hashing on the way to disk."""
+        with storage_op('blob_write', self.directory) as op:
+            out = self.writer()
+            try:
+                write(out)
+                sha256, size = out.commit(link_to)
+            except BaseException:
+                out.abort()
+                raise
+            op.bytes = size
+            op.rows = 1
+        return sha256, size
+
+    def _link(self, blob_path: str, dst_path: str):
+        with storage_op('blob_link', self.directory) as op:
+            ensure_dir(os.path.dirname(dst_path))
+            tmp_link = f"{dst_path}.{uid('link')}.tmp"
+            try:
+                os.link(blob_path, tmp_link)
+            except FileNotFoundError:
+                raise
+            except OSError:
+                # filesystems without hard links get a private copy instead
+                shutil.copyfile(blob_path, tmp_link)
+                op.bytes = os.path.getsize(tmp_link)
+            os.replace(tmp_link, dst_path)
+            op.rows = 1
+
+    def link(self, sha256: str, dst_path: str):
+        """Expose blob ``sha256`` at ``dst_path``, replacing whatever was there.
+
+        Raises FileNotFoundError if the blob has been released.
+        """
+        with self._locked(sha256):
+            self._link(self.path_for(sha256), dst_path)
+
+    def release(self, sha256: str) -> bool:
+        """Delete blob ``sha256`` unless an upload path still hard-links it; True if it was deleted.
+
+        The link count catches uploads linked but not yet recorded in
+        documents.csv, which the caller's reference count cannot see.
+        """
+        path = self.path_for(sha256)
+        with self._locked(sha256):
+            try:
+                if os.stat(path).st_nlink > 1:
+                    return False
+                os.remove(path)
+                return True
+            except FileNotFoundError:
+                return False
@@ -0,0 +1,262 @@
+import csv
+import io
+import os
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from .metrics import storage_op
+from .utils import atomic_write, ensure_dir, file_lock, write_csv
+
+Entry = Tuple[int, int]  # (byte offset, byte length) of one CSV record
+
+
+def iter_records(f, start: int) -> Iterator[Tuple[int, bytes]]:
+    """Yield ``(offset, raw_bytes)`` for each CSV record from ``start`` in a binary file.
+
+    Quoted fields may span lines, so physical lines are joined until the
+    record has a balanced number of quote characters.
+    """
+    f.seek(start)
+    offset = start
+    pending = b''
+    pending_offset = start
+    for line in iter(f.readline, b''):
+        if not pending:
+            pending_offset = offset
+        pending += line
+        offset += len(line)
+        if pending.count(b'"') % 2 == 0:
+            yield pending_offset, pending
+            pending = b''
+    if pending:
+        yield pending_offset, pending
+
+
+def parse_record(raw: bytes) -> List[str]:
+    return next(csv.reader(io.StringIO(raw.decode('utf-8'), newline='')), [])
+
+
+class CaseLog:
+    """Append-only CSV log with a sidecar index of byte offsets per case_id.
+
+    ``<path>.idx`` holds one ``offset length case_id`` line per record, in
+    append order. Reading a case's rows seeks straight to its records, which
+    come back in the order they were written, without scanning or sorting the
+    log. The sidecar is caught up from the CSV tail if rows were appended
+    behind its back and rebuilt if the CSV was rewritten.
+    """
+
+    def __init__(self, path: str, fieldnames: List[str], key: str = 'case_id'):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.fieldnames = list(fieldnames)
+        self.key = key
+        self._lock = threading.RLock()
+        self._offsets: Dict[str, List[Entry]] = {}
+        self._header: List[str] = []
+        self._indexed_size = 0
+        self._index_pos = 0
+        self._inode: Optional[int] = None
+        self._loaded = False
+
+    # -- index maintenance ---------------------------------------------------
+
+    def _reset(self):
+        self._offsets = {}
+        self._header = []
+        self._indexed_size = 0
+        self._index_pos = 0
+
+    def _read_sidecar(self, inode: int) -> bool:
+        """Load sidecar entries past ``_index_pos``; False if the sidecar belongs to another file."""
+        try:
+            f = open(self.index_path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return False
+        with f:
+            f.seek(self._index_pos)
+            if self._index_pos == 0:
+                first = f.readline()
+                if first.strip() != f"# {inode}":
+                    return False
+            for line in iter(f.readline, ''):
+                if not line.endswith('\n'):
+                    break  # partially written entry; pick it up next time
+                offset, length, key = line.rstrip('\n').split(' ', 2)
+                entry = (int(offset), int(length))
+                self._offsets.setdefault(unquote(key), []).append(entry)
+                self._indexed_size = max(self._indexed_size, entry[0] + entry[1])
+                self._index_pos = f.tell()
+        return True
+
+    def _write_sidecar(self, inode: int, entries: List[Tuple[str, Entry]], fresh: bool = False):
+        lines = ''.join(f"{offset} {length} {quote(key, safe='')}\n" for key, (offset, length) in entries)
+        if fresh:
+            with atomic_write(self.index_path, 'w', encoding='utf-8') as f:
+                f.write(f"# {inode}\n" + lines)
+                self._index_pos = f.tell()
+            return
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            self._index_pos = f.tell()
+
+    def _scan_tail(self, inode: int, fresh: bool):
+        """Index CSV records the sidecar does not cover yet."""
+        entries: List[Tuple[str, Entry]] = []
+        with storage_op('scan', self.path) as op, open(self.path, 'rb') as f:
+            start = self._indexed_size
+            for offset, raw in iter_records(f, start):
+                if not raw.endswith(b'\n'):
+                    break
+                if not self._header and offset == 0:
+                    self._header = parse_record(raw)
+                    self._indexed_size = len(raw)
+                    continue
+                values = parse_record(raw)
+                row = dict(zip(self._header, values))
+                key = row.get(self.key) or ''
+                entry = (offset, len(raw))
+                self._offsets.setdefault(key, []).append(entry)
+                entries.append((key, entry))
+                self._indexed_size = offset + len(raw)
+            op.rows = len(entries)
+            op.bytes = self._indexed_size - start
+        if entries or fresh:
+            self._write_sidecar(inode, entries, fresh=fresh)
+
+    def _read_header(self):
+        with open(self.path, 'rb') as f:
+            for _, raw in iter_records(f, 0):
+                self._header = parse_record(raw)
+                if self._indexed_size == 0:
+                    self._indexed_size = len(raw)
+                break
+
+    def _refresh(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset()
+            self._inode = None
+            self._loaded = True
+            return
+        if self._loaded and st.st_ino == self._inode and st.st_size == self._indexed_size:
+            return
+        # another writer may be mid-append; its sidecar entries are complete once we hold the lock
+        with file_lock(self.path):
+            self._sync()
+
+    def _sync(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset()
+            self._inode = None
+            return
+        stale = (not self._loaded or st.st_ino != self._inode or st.st_size < self._indexed_size)
+        if stale:
+            self._reset()
+            self._inode = st.st_ino
+            self._loaded = True
+            if not self._read_sidecar(st.st_ino) or self._indexed_size > st.st_size:
+                self._reset()
+                self._scan_tail(st.st_ino, fresh=True)
+                return
+            self._read_header()
+        if st.st_size > self._indexed_size:
+            self._read_sidecar(st.st_ino)
+            if st.st_size > self._indexed_size:
+                self._scan_tail(st.st_ino, fresh=False)
+
+    def rebuild(self):
+        with self._lock, file_lock(self.path):
+            self._loaded = False
+            try:
+                os.remove(self.index_path)
+            except FileNotFoundError:
+                pass
+            self._refresh()
+
+    # -- public API ----------------------------------------------------------
+
+    def append(self, rows: List[Dict]):
+        if not rows:
+            return
+        with self._lock, file_lock(self.path):
+            self._refresh()
+            ensure_dir(os.path.dirname(self.path))
+            header = self._header or self.fieldnames
+            entries: List[Tuple[str, Entry]] = []
+            with storage_op('append', self.path) as op, open(self.path, 'ab') as f:
+                fresh = f.tell() == 0
+                start = f.tell()
+                if fresh:
+                    f.write(self._render(header, dict(zip(header, header))))
+                    self._header = list(header)
+                for row in rows:
+                    data = self._render(header, row)
+                    entry = (f.tell(), len(data))
+                    f.write(data)
+                    key = str(row.get(self.key) or '')
+                    self._offsets.setdefault(key, []).append(entry)
+                    entries.append((key, entry))
+                self._indexed_size = f.tell()
+                op.rows = len(rows)
+                op.bytes = self._indexed_size - start
+            st = os.stat(self.path)
+            self._inode = st.st_ino
+            self._write_sidecar(st.st_ino, entries, fresh=fresh)
+
+    @staticmethod
+    def _render(header: List[str], row: Dict) -> bytes:
+        buf = io.StringIO()
+        csv.DictWriter(buf, fieldnames=header, extrasaction='ignore').writerow(row)
+        return buf.getvalue().encode('utf-8')
+
+    def for_case(self, key: str) -> List[Dict[str, str]]:
+        """Rows for ``key`` in append order, read by seeking to their offsets."""
+        with self._lock:
+            self._refresh()
+            return self._read_entries(self._header, self._offsets.get(key, []))
+
+    def _read_entries(self, header: List[str], entries: List[Entry]) -> List[Dict[str, str]]:
+        rows: List[Dict[str, str]] = []
+        if not entries:
+            return rows
+        with storage_op('read', self.path) as op, open(self.path, 'rb') as f:
+            for offset, length in entries:
+                f.seek(offset)
+                rows.append(dict(zip(header, parse_record(f.read(length)))))
+                op.bytes += length
+            op.rows = len(rows)
+        return rows
+
+    def page(self, key: str, limit: int, after: Optional[int] = None) -> Tuple[List[Dict[str, str]], Optional[int]]:
+        """Up to ``limit`` rows for ``key`` past its first ``after`` rows.
+
+        The second element is the ordinal to resume from when more rows
+        remain. Ordinals count a key's own rows in append order, so they stay
+        valid when the log is rewritten to drop other keys.
+        """
+        with self._lock:
+            self._refresh()
+            entries = self._offsets.get(key, [])
+            start = max(0, after or 0)
+            selected = entries[start:start + limit]
+            rows = self._read_entries(self._header, selected)
+            more = start + limit < len(entries)
+            return rows, (start + len(selected) if more else None)
+
+    def remove_cases(self, keys: Iterable[str]):
+        """Physically drop every row for ``keys`` by rewriting the log and its index once."""
+        with self._lock, file_lock(self.path):
+            self._refresh()
+            dead = {key for key in keys if key in self._offsets}
+            if not dead:
+                return
+            header = list(self._header)
+            entries = sorted(entry for k, offsets in self._offsets.items() if k not in dead for entry in offsets)
+            rows = self._read_entries(header, entries)
+            write_csv(self.path, rows, header or self.fieldnames)
+            self.rebuild()
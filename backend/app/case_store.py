@@ -0,0 +1,290 @@
+import csv
+import logging
+from bisect import bisect_left
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .metrics import storage_op
+from .utils import append_csv_rows, file_lock, write_csv
+
+Row = Dict[str, str]
+
+logger = logging.getLogger(__name__)
+
+
+def _warn_duplicates(path: str, duplicates: List[str]):
+    if duplicates:
+        logger.warning(
+            "%s has %d rows repeating an earlier case_id (e.g. %s); only the first row of each case is used "
+            "and the others are dropped when the file is next rewritten",
+            path, len(duplicates), ', '.join(sorted(set(duplicates))[:5]),
+        )
+
+
+class CaseStore:
+    """In-process view of cases.csv with a case_id hash index and stage/payer secondary indexes.
+
+    The file is parsed once and re-parsed only when its mtime or size changes,
+    so single-case reads are dictionary lookups and stage or payer filters
+    only visit matching cases. Writes go through to disk and keep the
+    in-memory indexes in sync without re-reading the file. Writes hold
+    the file's inter-process lock and refresh first, so several worker
+    processes can share one cases.csv without losing each other's updates.
+    A case_id that appears on several rows is served from its first row, with
+    a warning.
+    """
+
+    def __init__(self, path: str, fieldnames: List[str], normalize: Callable[[Dict[str, Optional[str]]], Optional[Row]]):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self._normalize = normalize
+        self._lock = threading.RLock()
+        self._rows: Dict[str, Row] = {}
+        self._by_stage: Dict[str, Dict[str, None]] = {}
+        self._by_payer: Dict[str, Dict[str, None]] = {}
+        self._header: List[str] = []
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._loaded = False
+        self._order: Optional[List[str]] = None
+        self._positions: Dict[str, int] = {}
+
+    # -- loading ---------------------------------------------------------
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        # rewrites are renamed into place, so the inode changes with every rewrite
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _refresh(self):
+        if self._loaded and self._stat() == self._signature:
+            return
+        with file_lock(self.path):
+            self._reload()
+
+    def _reload(self):
+        signature = self._stat()
+        if self._loaded and signature == self._signature:
+            return
+        self._rows = {}
+        self._by_stage = {}
+        self._by_payer = {}
+        self._header = []
+        self._order = None
+        if signature is not None:
+            with storage_op('read', self.path) as op, open(self.path, newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                self._header = next(reader, [])
+                duplicates: List[str] = []
+                for raw_row in reader:
+                    op.rows += 1
+                    if not any(raw_row):
+                        continue
+                    mapping = {self._header[i]: raw_row[i] for i in range(min(len(self._header), len(raw_row)))}
+                    normalized = self._normalize(mapping)
+                    if not normalized:
+                        continue
+                    if normalized['case_id'] in self._rows:
+                        duplicates.append(normalized['case_id'])
+                    else:
+                        self._rows[normalized['case_id']] = normalized
+                        self._index(normalized)
+                op.bytes = signature[2]
+                _warn_duplicates(self.path, duplicates)
+        self._signature = signature
+        self._loaded = True
+
+    def _ordered_ids(self) -> List[str]:
+        """Case ids in file (creation) order, cached until the set of cases changes."""
+        if self._order is None:
+            self._order = list(self._rows)
+            self._positions = {case_id: pos for pos, case_id in enumerate(self._order)}
+        return self._order
+
+    def _index(self, row: Row):
+        self._by_stage.setdefault(row.get('workflow_stage') or '', {})[row['case_id']] = None
+        self._by_payer.setdefault(row.get('payer') or '', {})[row['case_id']] = None
+
+    def _unindex(self, row: Row):
+        for index, key in ((self._by_stage, row.get('workflow_stage') or ''), (self._by_payer, row.get('payer') or '')):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(row['case_id'], None)
+                if not bucket:
+                    index.pop(key, None)
+
+    def _matching_positions(self, stage: Optional[str], payer: Optional[str]) -> Optional[List[int]]:
+        """Sorted file positions of the cases matching every given filter; None when there is no filter."""
+        buckets = []
+        if stage is not None:
+            buckets.append(self._by_stage.get(stage, {}))
+        if payer is not None:
+            buckets.append(self._by_payer.get(payer, {}))
+        if not buckets:
+            return None
+        smallest = min(buckets, key=len)
+        self._ordered_ids()
+        return sorted(self._positions[case_id] for case_id in smallest if all(case_id in bucket for bucket in buckets))
+
+    def _prepare(self, row: Dict) -> Row:
+        base = {field: '' for field in self.fieldnames}
+        for key, value in row.items():
+            if key in base:
+                base[key] = '' if value is None else str(value)
+        return base
+
+    def _flush(self):
+        write_csv(self.path, list(self._rows.values()), self.fieldnames)
+        self._header = list(self.fieldnames)
+        self._signature = self._stat()
+
+    # -- reads -----------------------------------------------------------
+
+    def all(self) -> List[Row]:
+        with self._lock:
+            self._refresh()
+            return [dict(row) for row in self._rows.values()]
+
+    def get(self, case_id: str) -> Optional[Row]:
+        with self._lock:
+            self._refresh()
+            row = self._rows.get(case_id)
+            return dict(row) if row is not None else None
+
+    def exists(self, case_id: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return case_id in self._rows
+
+    def find(self, stage: Optional[str] = None, payer: Optional[str] = None) -> List[Row]:
+        """Cases whose ``workflow_stage`` and ``payer`` equal the given values, in file order."""
+        with self._lock:
+            self._refresh()
+            positions = self._matching_positions(stage, payer)
+            if positions is None:
+                return [dict(row) for row in self._rows.values()]
+            order = self._ordered_ids()
+            return [dict(self._rows[order[pos]]) for pos in positions]
+
+    def page(self, limit: int, after: Optional[str] = None, after_pos: Optional[int] = None,
+             stage: Optional[str] = None, payer: Optional[str] = None) -> Tuple[List[Row], Optional[Tuple[str, int]]]:
+        """Return up to ``limit`` cases newest first, starting after case ``after``.
+
+        ``after_pos`` is the file position the cursor case had when the cursor
+        was issued; it is used as the resume point if that case has since been
+        deleted. The second element is ``(case_id, position)`` of the last row
+        when more rows remain, otherwise None. ``stage`` and ``payer`` restrict
+        the page to matching cases, read through the secondary indexes.
+        """
+        with self._lock:
+            self._refresh()
+            order = self._ordered_ids()
+            if after is None:
+                start = len(order)
+            elif after in self._positions:
+                start = self._positions[after]
+            else:
+                start = min(max(after_pos or 0, 0), len(order))
+            positions = self._matching_positions(stage, payer)
+            if positions is None:
+                stop = max(start - limit, 0)
+                ids = order[stop:start][::-1]
+                more = stop > 0
+            else:
+                end = bisect_left(positions, start)
+                begin = max(end - limit, 0)
+                stop = positions[begin] if end else 0
+                ids = [order[pos] for pos in positions[begin:end]][::-1]
+                more = begin > 0
+            rows = [dict(self._rows[case_id]) for case_id in ids]
+            if ids and more:
+                return rows, (ids[-1], stop)
+            return rows, None
+
+    # -- writes ----------------------------------------------------------
+
+    def add(self, row: Dict):
+        self.add_many([row])
+
+    def add_many(self, rows: Iterable[Dict]):
+        """Insert rows; new cases are appended, replacing an existing case rewrites the file."""
+        with self._lock, file_lock(self.path):
+            self._refresh()
+            appended: List[Row] = []
+            rewrite = False
+            for row in rows:
+                prepared = self._prepare(row)
+                existing = self._rows.get(prepared['case_id'])
+                if existing is not None:
+                    self._unindex(existing)
+                    rewrite = True
+                else:
+                    appended.append(prepared)
+                    self._order = None
+                self._rows[prepared['case_id']] = prepared
+                self._index(prepared)
+            if rewrite or self._signature is None or self._header != self.fieldnames:
+                self._flush()
+            elif appended:
+                append_csv_rows(self.path, appended, self.fieldnames)
+                self._signature = self._stat()
+
+    def update(self, case_id: str, updates: Dict) -> Optional[Row]:
+        return self.update_many({case_id: updates}).get(case_id)
+
+    def update_many(self, updates: Dict[str, Dict]) -> Dict[str, Row]:
+        """Apply per-case field updates and rewrite the file once."""
+        with self._lock, file_lock(self.path):
+            self._refresh()
+            changed: Dict[str, Row] = {}
+            for case_id, fields in updates.items():
+                row = self._rows.get(case_id)
+                if row is None:
+                    continue
+                self._unindex(row)
+                for key, value in fields.items():
+                    row[key] = '' if value is None else str(value)
+                self._index(row)
+                changed[case_id] = dict(row)
+            if changed:
+                self._flush()
+            return changed
+
+    def remove_many(self, case_ids: Iterable[str]) -> List[str]:
+        """Drop the given cases with a single rewrite; returns the ids that were present."""
+        with self._lock, file_lock(self.path):
+            self._refresh()
+            removed: List[str] = []
+            for case_id in case_ids:
+                row = self._rows.pop(case_id, None)
+                if row is None:
+                    continue
+                self._unindex(row)
+                removed.append(case_id)
+            if removed:
+                self._order = None
+                self._flush()
+            return removed
+
+    def replace_all(self, rows: Iterable[Dict]):
+        with self._lock, file_lock(self.path):
+            self._rows = {}
+            self._by_stage = {}
+            self._by_payer = {}
+            self._order = None
+            duplicates: List[str] = []
+            for row in rows:
+                prepared = self._prepare(row)
+                if not prepared['case_id']:
+                    continue
+                if prepared['case_id'] in self._rows:
+                    duplicates.append(prepared['case_id'])
+                else:
+                    self._rows[prepared['case_id']] = prepared
+                    self._index(prepared)
+            _warn_duplicates(self.path, duplicates)
+            self._flush()
+            self._loaded = True
@@ -0,0 +1,213 @@
+import csv
+import logging
+import os
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+NUMERIC_CODE_PATTERN = re.compile(r'^\d{1,4}$')
+CODE_TERM_PATTERN = re.compile(r'^d\d{0,4}$')
+STOP_WORDS = frozenset({'a', 'an', 'and', 'by', 'for', 'in', 'of', 'on', 'or', 'per', 'the', 'to', 'with'})
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+class CodeCatalog:
+    """Immutable CDT code catalog with prefix and description search.
+
+    Codes are kept sorted, so a code prefix is a bisect over one list. The
+    description index is a sorted vocabulary whose entries point at compact
+    ``array`` posting lists of code positions. Every token in a query must
+    match, and the last token also matches as a prefix, so results narrow as
+    the user types. Build once and share: nothing is mutated after
+    ``__init__``.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, str]]):
+        entries: Dict[str, tuple] = {}
+        for row in rows:
+            code = (row.get('code') or '').strip().upper()
+            description = (row.get('description') or '').strip()
+            if code and description:
+                entries[code] = (description, (row.get('category') or '').strip())
+        self.codes: List[str] = sorted(entries)
+        self.descriptions: List[str] = [entries[code][0] for code in self.codes]
+        self.categories: List[str] = [entries[code][1] for code in self.codes]
+        self._positions: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+
+        index: Dict[str, List[int]] = {}
+        for i, code in enumerate(self.codes):
+            # code positions are visited in order, so every posting list comes out sorted
+            for token in dict.fromkeys(tokenize(f'{code} {self.descriptions[i]} {self.categories[i]}')):
+                index.setdefault(token, []).append(i)
+        self.vocabulary: List[str] = sorted(index)
+        self.postings: List[array] = [array('I', index[token]) for token in self.vocabulary]
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'CodeCatalog':
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            # accept either case for the column names
+            return cls({(key or '').strip().lower(): value for key, value in row.items()} for row in reader)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._positions
+
+    def get(self, code: str) -> Optional[str]:
+        i = self._positions.get(code)
+        return self.descriptions[i] if i is not None else None
+
+    def entry(self, i: int) -> Dict[str, Optional[str]]:
+        return {'code': self.codes[i], 'description': self.descriptions[i], 'category': self.categories[i] or None}
+
+    def _term_postings(self, term: str, prefix: bool) -> Sequence[int]:
+        if prefix and CODE_TERM_PATTERN.match(term):
+            # sorted codes make a code prefix one contiguous run of positions
+            code = term.upper()
+            return range(bisect_left(self.codes, code), bisect_left(self.codes, code + '\uffff'))
+        lo = bisect_left(self.vocabulary, term)
+        if not prefix:
+            return self.postings[lo] if lo < len(self.vocabulary) and self.vocabulary[lo] == term else ()
+        hi = bisect_left(self.vocabulary, term + '\uffff', lo)
+        if hi - lo == 1:
+            return self.postings[lo]
+        return sorted(set().union(*self.postings[lo:hi]))
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Optional[str]]]:
+        """Codes matching ``query`` in code order.
+
+        ``D71`` or ``71`` list codes by prefix; words match descriptions and
+        categories, with the final word treated as a prefix unless the query
+        ends in whitespace.
+        """
+        query = query or ''
+        if NUMERIC_CODE_PATTERN.match(query.strip()):
+            query = 'd' + query.strip()
+        terms = tokenize(query)
+        if not terms or limit <= 0:
+            return []
+        last_is_prefix = not query[-1].isspace()
+        terms = list(dict.fromkeys(terms))
+        lists = [
+            self._term_postings(term, prefix=last_is_prefix and n == len(terms) - 1)
+            for n, term in enumerate(terms)
+        ]
+        if len(lists) == 1:
+            hits: Sequence[int] = lists[0][:limit]
+        else:
+            lists.sort(key=len)
+            hits = sorted(set(lists[0]).intersection(*lists[1:]))[:limit]
+        return [self.entry(i) for i in hits]
+
+
+class CatalogLoader:
+    """Holds the current ``CodeCatalog`` and reloads it when its file changes.
+
+    ``load`` runs at startup; afterwards a watcher thread stats the file every
+    ``interval`` seconds and, on a change, builds a new catalog off to the side
+    and swaps the reference in one assignment. Request threads only read
+    ``catalog`` and never touch the filesystem. A failed reload keeps serving
+    the previous catalog.
+    """
+
+    def __init__(self, path: str, interval: float):
+        self.path = path
+        self.interval = interval
+        self.catalog = CodeCatalog([])
+        self.reloads = 0
+        self.failures = 0
+        self.last_reload_seconds: Optional[float] = None
+        self.total_reload_seconds = 0.0
+        self.loaded_at: Optional[float] = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def get(self) -> CodeCatalog:
+        if not self._loaded:
+            self.load()  # only when used outside the app lifecycle, e.g. from scripts
+        return self.catalog
+
+    def load(self, force: bool = False) -> bool:
+        """Rebuild the catalog if the file changed; returns True when a new catalog was swapped in."""
+        with self._lock:
+            signature = self._stat()
+            if self._loaded and not force and signature == self._signature:
+                return False
+            started = time.perf_counter()
+            if signature is None:
+                if len(self.catalog):
+                    logger.warning("ADA codes file missing at %s", self.path)
+                catalog = CodeCatalog([])
+            else:
+                try:
+                    catalog = CodeCatalog.from_csv(self.path)
+                except Exception as exc:
+                    self.failures += 1
+                    self._signature = signature  # retry once the file changes again
+                    self._loaded = True
+                    logger.error("Failed to load ADA codes: %s", exc)
+                    return False
+            elapsed = time.perf_counter() - started
+            self.catalog = catalog
+            self._signature = signature
+            self._loaded = True
+            self.reloads += 1
+            self.last_reload_seconds = elapsed
+            self.total_reload_seconds += elapsed
+            self.loaded_at = time.time()
+        logger.info("Loaded %d ADA codes from %s in %.1f ms", len(catalog), self.path, elapsed * 1000)
+        return True
+
+    def start(self):
+        self.load()
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='ada-codes-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.load()
+            except Exception:
+                logger.exception("ADA code catalog watcher failed")
+
+    def metrics(self) -> Dict:
+        return {
+            'path': self.path,
+            'codes': len(self.catalog),
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'last_reload_ms': round(self.last_reload_seconds * 1000, 3) if self.last_reload_seconds is not None else None,
+            'total_reload_ms': round(self.total_reload_seconds * 1000, 3),
+            'loaded_at': self.loaded_at,
+        }
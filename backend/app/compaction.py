@@ -0,0 +1,67 @@
+import logging
+import threading
+from typing import Callable, Optional
+
+from .settings import settings
+from . import workflow
+
+logger = logging.getLogger(__name__)
+
+
+class Compactor:
+    """Background thread that removes deleted cases' data in batches.
+
+    It runs every ``interval`` seconds, or as soon as ``wake`` is called after a
+    delete, and keeps compacting batches until no tombstones are left.
+    """
+
+    def __init__(self, compact: Callable[[int], int], interval: float, batch_size: int):
+        self.compact = compact
+        self.interval = interval
+        self.batch_size = batch_size
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='compactor', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        thread.join(timeout)
+
+    def wake(self):
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                while not self._stop.is_set() and self.compact(self.batch_size):
+                    pass
+            except Exception:
+                logger.exception("Compaction failed; retrying in %ss", self.interval)
+
+
+_COMPACTOR = Compactor(workflow.compact_deleted_cases, settings.COMPACTION_INTERVAL_SECONDS, settings.COMPACTION_BATCH_SIZE)
+
+
+def start():
+    _COMPACTOR.start()
+
+
+def stop():
+    _COMPACTOR.stop()
+
+
+def wake():
+    _COMPACTOR.wake()
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from .settings import settings
+from .utils import atomic_write, file_lock
+
+logger = logging.getLogger(__name__)
+
+# sentinel put on a subscription's queue to end its stream
+CLOSED = None
+
+
+class Subscription:
+    """One listener's bounded queue, fed from any thread and drained on its event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, case_id: Optional[str], max_queue: int):
+        self.loop = loop
+        self.case_id = case_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def wants(self, event: Dict) -> bool:
+        return self.case_id is None or event['case_id'] == self.case_id
+
+    def _offer(self, event: Optional[Dict]):
+        # runs on the subscriber's loop
+        if self.overflowed:
+            return
+        if event is CLOSED:
+            while self.queue.full():
+                self.queue.get_nowait()
+            self.queue.put_nowait(CLOSED)
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # a client this far behind must resync; end its stream instead of buffering without bound
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(CLOSED)
+
+    def deliver(self, event: Optional[Dict]):
+        try:
+            self.loop.call_soon_threadsafe(self._offer, event)
+        except RuntimeError:
+            pass  # the subscriber's loop is already closed
+
+
+class EventBus:
+    """Publish/subscribe for case and message changes, shared by every worker process.
+
+    Workflow writes publish events after they reach disk by appending them to
+    an NDJSON log in the data directory, under the log's file lock. An event's
+    id is its byte position in the log since it was created (``base`` from
+    the log's header line plus the offset of the event's line), so ids mean
+    the same thing on every worker and keep increasing across restarts. Each
+    process tails the log on a thread while it has subscribers, holds the
+    log's events as history for ``Last-Event-ID`` replay and hands new ones to
+    its subscribers. The publishing process wakes its tailer at once; other
+    workers pick events up within ``poll_interval`` seconds. Past
+    ``max_bytes`` the log is rewritten keeping its newer half; clients whose
+    last event was dropped get a reset.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 4 * 1024 * 1024, poll_interval: float = 0.25, max_queue: int = 1000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.poll_interval = poll_interval
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers: Set[Subscription] = set()
+        # tail state: the log file being read, how far, and what it held
+        self._inode: Optional[int] = None
+        self._pos = 0
+        self._base = 0
+        self._resume_from = 0
+        self._last_id = 0
+        self._history: Deque[Dict] = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- writing ---------------------------------------------------------------
+
+    def publish(self, kind: str, case_id: str, data: Dict):
+        event = {'event': kind, 'case_id': case_id, 'data': data}
+        with file_lock(self.path):
+            header = self._read_header()
+            if header is None:
+                header = self._rewrite({'base': 0, 'resume_from': 0}, [])
+            elif os.path.getsize(self.path) > self.max_bytes:
+                header = self._rotate(header)
+            with open(self.path, 'ab') as f:
+                event['id'] = header['base'] + f.tell()
+                f.write(json.dumps(event, separators=(',', ':')).encode('utf-8') + b'\n')
+        self._wake.set()
+
+    def _read_header(self) -> Optional[Dict]:
+        try:
+            with open(self.path, 'rb') as f:
+                return json.loads(f.readline())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _rewrite(self, header: Dict, lines: List[bytes]) -> Dict:
+        with atomic_write(self.path, 'wb') as f:
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            f.writelines(lines)
+        return header
+
+    def _rotate(self, header: Dict) -> Dict:
+        """Drop the older half of the log; later ids stay above every id it held."""
+        with open(self.path, 'rb') as f:
+            f.readline()
+            lines = [line for line in f if line.endswith(b'\n')]
+            size = f.tell()
+        keep, total = [], 0
+        for line in reversed(lines):
+            if total + len(line) > self.max_bytes // 2:
+                break
+            keep.append(line)
+            total += len(line)
+        keep.reverse()
+        dropped = lines[:len(lines) - len(keep)]
+        resume_from = json.loads(dropped[-1])['id'] if dropped else header['resume_from']
+        # new offsets start past the header, so base + offset exceeds every id in the old file
+        return self._rewrite({'base': header['base'] + size, 'resume_from': resume_from}, keep)
+
+    # -- tailing ---------------------------------------------------------------
+
+    def _poll(self):
+        """Read events appended since the last poll and deliver them; caller holds ``_lock``."""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            if inode != self._inode:
+                # first read, or the log was rotated: start over from its header
+                header = json.loads(f.readline() or b'{}')
+                if not header:
+                    return
+                if header['base'] < self._base or header['resume_from'] > self._last_id:
+                    # a different log, or one rotated past events not read yet: streams must resync
+                    if header['base'] < self._base:
+                        self._last_id = 0
+                        self._history.clear()
+                    for sub in self._subscribers:
+                        sub.deliver(CLOSED)
+                    self._subscribers.clear()
+                self._inode = inode
+                self._base = header['base']
+                self._resume_from = header['resume_from']
+                self._pos = f.tell()
+                self._history = deque(e for e in self._history if e['id'] > self._resume_from)
+            f.seek(self._pos)
+            fresh: List[Dict] = []
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # partially written; read it next time
+                self._pos += len(line)
+                event = json.loads(line)
+                if event['id'] > self._last_id:
+                    self._last_id = event['id']
+                    self._history.append(event)
+                    fresh.append(event)
+        for event in fresh:
+            for sub in self._subscribers:
+                if sub.wants(event):
+                    sub.deliver(event)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                with self._lock:
+                    self._poll()
+            except Exception:
+                logger.exception("Reading the event log %s failed", self.path)
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='event-log-tail', daemon=True)
+            self._thread.start()
+
+    # -- subscribers -----------------------------------------------------------
+
+    def subscribe(self, loop: asyncio.AbstractEventLoop, case_id: Optional[str] = None,
+                  last_event_id: Optional[int] = None) -> Tuple[Subscription, Optional[List[Dict]]]:
+        """Register a listener whose events are delivered on ``loop``.
+
+        Also returns the logged events after ``last_event_id``, or None when
+        that id cannot be resumed from (it was rotated out or belongs to
+        another log) and the client must refetch. Reads the log, so call it
+        off the event loop.
+        """
+        sub = Subscription(loop, case_id, self.max_queue)
+        with self._lock:
+            self._poll()
+            self._subscribers.add(sub)
+            self._start()
+            backlog: Optional[List[Dict]] = []
+            if last_event_id is not None:
+                if last_event_id > self._last_id or last_event_id < self._resume_from:
+                    backlog = None
+                else:
+                    backlog = [e for e in self._history if e['id'] > last_event_id and sub.wants(e)]
+        return sub, backlog
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def close(self):
+        """End every open stream and stop tailing, e.g. on shutdown."""
+        with self._lock:
+            subscribers, self._subscribers = list(self._subscribers), set()
+        self._stop.set()
+        self._wake.set()
+        for sub in subscribers:
+            sub.deliver(CLOSED)
+
+
+_BUS = EventBus(
+    os.path.join(settings.DATA_DIR, 'events.log'),
+    settings.EVENT_LOG_MAX_BYTES,
+    settings.SSE_POLL_INTERVAL_SECONDS,
+)
+
+
+def publish(kind: str, case_id: str, data: Dict):
+    _BUS.publish(kind, case_id, data)
+
+
+def subscribe(loop: asyncio.AbstractEventLoop, case_id: Optional[str] = None, last_event_id: Optional[int] = None):
+    return _BUS.subscribe(loop, case_id, last_event_id)
+
+
+def unsubscribe(sub: Subscription):
+    _BUS.unsubscribe(sub)
+
+
+def close():
+    _BUS.close()
@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from .models import CaseCreate
+
+FORMATS = ('csv', 'ndjson')
+MAX_REPORTED_ERRORS = 100
+
+CONTENT_TYPE_FORMATS = {
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'application/json': 'ndjson',
+}
+
+
+def format_for_content_type(content_type: Optional[str]) -> Optional[str]:
+    media_type = (content_type or '').split(';', 1)[0].strip().lower()
+    return CONTENT_TYPE_FORMATS.get(media_type)
+
+
+class CaseImporter:
+    """Incremental parser and validator for a bulk case import body.
+
+    The body is fed chunk by chunk as it arrives; ``feed`` returns the rows
+    completed by that chunk which validate against ``CaseCreate``. Rows that
+    fail to parse or validate are counted and reported by physical line
+    number, so one bad row never aborts the rest of the import. CSV input
+    needs a header row with at least a ``title`` column; quoted fields may
+    span lines.
+    """
+
+    def __init__(self, fmt: str):
+        if fmt not in FORMATS:
+            raise ValueError(f"unsupported import format '{fmt}'")
+        self.fmt = fmt
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict] = []
+        self._buffer = bytearray()
+        self._line_no = 0
+        self._header: Optional[List[str]] = None
+        self._pending: List[str] = []
+        self._pending_line = 0
+        self._started = time.perf_counter()
+
+    # -- parsing -------------------------------------------------------------
+
+    def feed(self, chunk: bytes) -> List[Dict]:
+        self._buffer += chunk
+        end = self._buffer.rfind(b'\n')
+        if end < 0:
+            return []
+        complete = bytes(self._buffer[:end])
+        del self._buffer[:end + 1]
+        return self._parse_lines(complete.split(b'\n'))
+
+    def close(self) -> List[Dict]:
+        """Parse whatever is left once the body has ended."""
+        lines = [bytes(self._buffer)] if self._buffer else []
+        self._buffer = bytearray()
+        payloads = self._parse_lines(lines)
+        if self._pending:
+            self._error(self._pending_line, 'unterminated quoted field')
+            self._pending = []
+        return payloads
+
+    def _parse_lines(self, lines: List[bytes]) -> List[Dict]:
+        payloads: List[Dict] = []
+        for raw in lines:
+            self._line_no += 1
+            try:
+                line = raw.decode('utf-8-sig' if self._line_no == 1 else 'utf-8').rstrip('\r')
+            except UnicodeDecodeError:
+                self._error(self._line_no, 'line is not valid UTF-8')
+                continue
+            parsed = self._parse_csv_line(line) if self.fmt == 'csv' else self._parse_ndjson_line(line)
+            if parsed is None:
+                continue
+            line_no, record = parsed
+            payload = self._validate(line_no, record)
+            if payload is not None:
+                payloads.append(payload)
+        return payloads
+
+    def _parse_ndjson_line(self, line: str) -> Optional[Tuple[int, Dict]]:
+        if not line.strip():
+            return None
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            self._error(self._line_no, f'invalid JSON: {exc.msg}')
+            return None
+        if not isinstance(record, dict):
+            self._error(self._line_no, 'expected a JSON object')
+            return None
+        return self._line_no, record
+
+    def _parse_csv_line(self, line: str) -> Optional[Tuple[int, Dict]]:
+        if not self._pending:
+            if not line.strip():
+                return None
+            self._pending_line = self._line_no
+        self._pending.append(line)
+        text = '\n'.join(self._pending)
+        if text.count('"') % 2:
+            return None  # a quoted field continues on the next line
+        self._pending = []
+        values = next(csv.reader(io.StringIO(text, newline='')), [])
+        if self._header is None:
+            self._header = [name.strip() for name in values]
+            if 'title' not in self._header:
+                raise ValueError("CSV header must include a 'title' column")
+            return None
+        record = {
+            name: value
+            for name, value in zip(self._header, values)
+            if value != ''  # empty CSV cells mean "not provided"
+        }
+        return self._pending_line, record
+
+    # -- validation and reporting -------------------------------------------
+
+    def _validate(self, line_no: int, record: Dict) -> Optional[Dict]:
+        try:
+            return CaseCreate.model_validate(record).model_dump()
+        except ValidationError as exc:
+            detail = '; '.join(
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors()
+            )
+            self._error(line_no, detail)
+            return None
+
+    def _error(self, line_no: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_no, 'error': message})
+
+    def report(self) -> Dict:
+        elapsed = time.perf_counter() - self._started
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(self.imported / elapsed, 1) if elapsed > 0 else None,
+        }
@@ -0,0 +1,233 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Optional
+
+from .settings import settings
+from .utils import atomic_write, file_lock, now_iso, uid
+
+JOBS_DIR = os.path.join(settings.DATA_DIR, 'jobs')
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict], Optional[Dict]]
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    """Persistent in-process job queue served by a bounded thread pool.
+
+    Every job is a JSON file under ``directory``, so queued and interrupted
+    jobs are picked up again by ``start`` after a restart. Jobs that share a
+    ``key`` (a case id) run one at a time in submission order; different
+    keys run in parallel up to ``workers``.
+    """
+
+    FINISHED = ('succeeded', 'failed')
+    PRUNE_INTERVAL_SECONDS = 600
+
+    def __init__(self, directory: str, workers: int, max_pending: int):
+        self.directory = directory
+        self.workers = workers
+        self.max_pending = max_pending
+        self._handlers: Dict[str, Handler] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._lanes: Dict[str, Deque[str]] = {}
+        self._pending = 0
+        self.retention_seconds: float = 0
+        self._last_prune = 0.0
+
+    def register(self, kind: str, handler: Handler):
+        self._handlers[kind] = handler
+
+    # -- persistence ---------------------------------------------------------
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f'{job_id}.json')
+
+    def _save(self, job: Dict):
+        job['updated_at'] = now_iso()
+        with atomic_write(self._path(job['job_id']), 'w', encoding='utf-8') as f:
+            json.dump(job, f, separators=(',', ':'))
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        if os.path.basename(job_id) != job_id:
+            return None
+        try:
+            with open(self._path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def start(self, retention_seconds: float = 0):
+        """Start the worker pool and re-queue jobs left unfinished by a previous run.
+
+        With ``retention_seconds``, finished job records older than that are
+        deleted now and again as later jobs finish (at most every
+        ``PRUNE_INTERVAL_SECONDS``).
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+            self.retention_seconds = retention_seconds
+        if not os.path.isdir(self.directory):
+            return
+        with self._lock:
+            queued = {job_id for lane in self._lanes.values() for job_id in lane}
+        unfinished = [job for job in self._scan(queued) if job.get('status') not in self.FINISHED]
+        for job in sorted(unfinished, key=lambda j: j.get('created_at', '')):
+            logger.info("Resuming %s job %s", job['kind'], job['job_id'])
+            self._enqueue(job)
+
+    def _scan(self, skip=frozenset()):
+        """Every readable job record not in ``skip``, deleting expired finished ones on the way."""
+        self._last_prune = time.monotonic()
+        cutoff = time.time() - self.retention_seconds
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not name.endswith('.json') or name[:-len('.json')] in skip:
+                continue
+            job = self.get(name[:-len('.json')])
+            if job is None:
+                continue
+            if job.get('status') in self.FINISHED and self.retention_seconds:
+                path = self._path(job['job_id'])
+                try:
+                    expired = os.path.getmtime(path) < cutoff
+                except FileNotFoundError:
+                    continue  # pruned by another worker
+                if expired:
+                    for stale in (path, path + '.lock'):
+                        try:
+                            os.remove(stale)
+                        except FileNotFoundError:
+                            pass
+                    continue
+            yield job
+
+    def prune(self):
+        """Delete finished job records older than the retention window."""
+        for _ in self._scan():
+            pass
+
+    def _maybe_prune(self):
+        if not self.retention_seconds:
+            return
+        with self._lock:
+            due = time.monotonic() - self._last_prune >= self.PRUNE_INTERVAL_SECONDS
+            if due:
+                self._last_prune = time.monotonic()
+        if due:
+            try:
+                self.prune()
+            except OSError:
+                logger.exception("Pruning finished jobs in %s failed", self.directory)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    # -- execution -----------------------------------------------------------
+
+    def submit(self, kind: str, payload: Dict, key: Optional[str] = None) -> Dict:
+        if kind not in self._handlers:
+            raise KeyError(f"no handler registered for job kind '{kind}'")
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull(f"{self._pending} jobs already pending")
+        now = now_iso()
+        job = {
+            'job_id': uid('job'),
+            'kind': kind,
+            'key': key or '',
+            'status': 'queued',
+            'payload': payload,
+            'result': None,
+            'error': None,
+            'created_at': now,
+            'updated_at': now,
+        }
+        self._save(job)
+        self._enqueue(job)
+        return job
+
+    def _enqueue(self, job: Dict):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+            self._pending += 1
+            lane = self._lanes.setdefault(job['key'], deque())
+            lane.append(job['job_id'])
+            if len(lane) == 1:
+                self._executor.submit(self._drain, job['key'])
+
+    def _drain(self, key: str):
+        while True:
+            with self._lock:
+                job_id = self._lanes[key][0]
+            try:
+                self._run(job_id)
+                self._maybe_prune()
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                    lane = self._lanes[key]
+                    lane.popleft()
+                    if not lane:
+                        del self._lanes[key]
+                        return
+
+    def _run(self, job_id: str):
+        # the job's lock stops another worker process that resumed the same job from running it twice
+        with file_lock(self._path(job_id)):
+            job = self.get(job_id)
+            if job is None or job.get('status') in self.FINISHED:
+                return
+            job['status'] = 'running'
+            self._save(job)
+            try:
+                job['result'] = self._handlers[job['kind']](job['payload'])
+                job['status'] = 'succeeded'
+            except Exception as exc:
+                logger.exception("Job %s (%s) failed", job_id, job['kind'])
+                job['status'] = 'failed'
+                job['error'] = str(exc)
+            self._save(job)
+
+
+_QUEUE = JobQueue(JOBS_DIR, settings.JOB_WORKERS, settings.JOB_QUEUE_LIMIT)
+
+
+def register(kind: str, handler: Handler):
+    _QUEUE.register(kind, handler)
+
+
+def submit(kind: str, payload: Dict, key: Optional[str] = None) -> Dict:
+    return _QUEUE.submit(kind, payload, key)
+
+
+def get(job_id: str) -> Optional[Dict]:
+    return _QUEUE.get(job_id)
+
+
+def start():
+    _QUEUE.start(settings.JOB_RETENTION_SECONDS)
+
+
+def shutdown(wait: bool = True):
+    _QUEUE.shutdown(wait)
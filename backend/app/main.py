@@ -1,19 +1,169 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
+import asyncio
+import json
 import logging
-import os, shutil
+import os
+import signal
+import threading
+import time
 
+from .blob_store import BlobStore, BlobWriter
 from .settings import settings
-from .utils import ensure_dir, uid, read_csv, append_csv, now_iso
-from .models import CaseCreate, Case, MessageCreate, Message, Document
-from . import workflow
+from .utils import ensure_dir, uid, now_iso
+from .lru_cache import VersionedLRU
+from .importer import FORMATS as IMPORT_FORMATS, CaseImporter, format_for_content_type
+from .uploads import MULTIPART_OVERHEAD_BYTES, MultipartUpload
+from .models import AdaCode, CodeCatalogStatus, CaseCreate, Case, CaseBatchDelete, CaseBatchDeleteResult, CasePackageRequest, CasePackageResult, MessageCreate, Message, Document, Job, ImportReport
+from .pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, parse_fields, project
+from . import compaction, events, export, jobs, metrics, migrations, openai_client, tracing, versions, workflow
 
 from fastapi.staticfiles import StaticFiles
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Amdal Backend", version="0.1.0")
+
+def _close_event_streams_on_exit():
+    """Chain onto the server's exit signals to end open event streams.
+
+    Graceful shutdown waits for in-flight responses before the lifespan exits,
+    so long-lived SSE responses have to be ended when the signal arrives.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            events.close()
+            previous(signum, frame)
+
+        signal.signal(sig, handler)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    version = migrations.run_migrations()
+    logger.info("Data directory at schema version %s", version)
+    workflow.start_ada_code_watcher()
+    jobs.register('document_upload', workflow.process_document_job)
+    jobs.start()
+    compaction.start()
+    _close_event_streams_on_exit()
+    yield
+    events.close()
+    compaction.stop()
+    jobs.shutdown()
+    workflow.shutdown_package_builder()
+    workflow.stop_ada_code_watcher()
+    await openai_client.aclose_async_client()
+    openai_client.close_client()
+
+
+TRACE_HEADER = 'X-Request-Trace'
+
+
+class ProfiledRoute(APIRoute):
+    """API route whose endpoint runs under cProfile when the request is traced."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, tracing.profile_endpoint(endpoint), **kwargs)
+
+
+app = FastAPI(title="Amdal Backend", version="0.1.0", lifespan=lifespan)
+app.router.route_class = ProfiledRoute
+
+
+class RequestMetricsMiddleware:
+    """Observe each request's latency under its route template, e.g. ``/cases/{case_id}``.
+
+    Streaming responses are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.observe_request(scope['method'], _route_label(scope), status, time.perf_counter() - started)
+
+
+def _route_label(scope) -> str:
+    # the router records the matched route in the shared scope
+    route = scope.get('route')
+    if route is not None:
+        return route.path
+    if 'app_root_path' in scope:  # a mount, such as the uploads static files
+        return scope['root_path'][len(scope['app_root_path']):] + '/{path}'
+    return 'unmatched'
+
+
+class RequestTracingMiddleware:
+    """Trace opted-in requests: storage operations and workflow calls, reported in ``Server-Timing``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _wanted(scope) -> bool:
+        if settings.REQUEST_TRACING == 'all':
+            return True
+        if settings.REQUEST_TRACING != 'header':
+            return False
+        value = dict(scope['headers']).get(TRACE_HEADER.lower().encode('latin-1'), b'')
+        return value not in (b'', b'0')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        trace = tracing.RequestTrace(scope['method'], scope['path'])
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                trace.route = _route_label(scope)
+                MutableHeaders(scope=message).append('Server-Timing', trace.server_timing())
+            await send(message)
+
+        token = tracing.activate(trace)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            tracing.deactivate(token)
+            trace.finish()
+            logger.info(
+                "Traced %s %s: %d storage ops in %.1f ms, %.1f ms total",
+                trace.method, trace.route or trace.path, len(trace.storage),
+                sum(entry['ms'] for entry in trace.storage), trace.elapsed * 1000,
+            )
+            if settings.REQUEST_PROFILE_DIR:
+                await run_in_threadpool(trace.dump, settings.REQUEST_PROFILE_DIR)
+
+
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(RequestTracingMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,12 +171,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, 'ETag', 'Server-Timing'],
 )
 
 CASES_CSV = os.path.join(settings.DATA_DIR, 'cases.csv')
 DOCS_CSV  = os.path.join(settings.DATA_DIR, 'documents.csv')
 MSGS_CSV  = os.path.join(settings.DATA_DIR, 'messages.csv')
 UPLOADS   = os.path.join(settings.DATA_DIR, 'uploads')
+BLOBS     = BlobStore(os.path.join(settings.DATA_DIR, 'blobs'))
 
 ensure_dir(UPLOADS)
 
@@ -43,7 +195,15 @@ def document_row_to_response(row: dict) -> dict:
     name = os.path.basename(name)
     public_url = row.get('public_url') or build_public_url(row['case_id'], name)
     path_value = row.get('path') or os.path.join(UPLOADS, row['case_id'], name)
-    return {**row, 'name': name, 'path': path_value, 'public_url': public_url}
+    size = row.get('size')
+    return {
+        **row,
+        'name': name,
+        'path': path_value,
+        'public_url': public_url,
+        'sha256': row.get('sha256') or None,
+        'size': int(size) if size and str(size).isdigit() else None,
+    }
 
 
 def to_float(value):
@@ -55,11 +215,14 @@ def to_float(value):
         return None
 
 
-def case_row_to_response(row: dict) -> dict:
+def case_row_to_response(row: dict, states: Optional[dict] = None) -> dict:
     data = dict(row)
     data['reimbursement_amount'] = to_float(data.get('reimbursement_amount'))
     if not data.get('workflow_stage'):
-        state = workflow.get_state(data['case_id'])
+        if states is not None:
+            state = states.get(data['case_id'], {})
+        else:
+            state = workflow.get_state(data['case_id'])
         data['workflow_stage'] = state.get('stage', 'awaiting_case_start')
     defaults = workflow.STAGE_DEFAULTS.get(data['workflow_stage'], {})
     if not data.get('workflow_status'):
@@ -74,6 +237,38 @@ def case_row_to_response(row: dict) -> dict:
     return data
 
 
+_CASE_RESPONSES = VersionedLRU(settings.CASE_RESPONSE_CACHE_SIZE)
+
+
+def _json_bytes(data) -> bytes:
+    # the same encoding FastAPI's JSONResponse uses
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':')).encode('utf-8')
+
+
+def render_cases(rows: List[dict], versions: List[tuple], cacheable: bool = True) -> List[Tuple[dict, bytes]]:
+    """Validated ``Case`` payloads and their JSON for each row, reusing renders of unchanged cases.
+
+    Entries are keyed by case version (``workflow.case_versions``), which
+    every write to a case's row or state bumps, so a changed case is simply
+    rendered again. Renders are stored only when ``cacheable``: the caller
+    must know no row is older than its version, e.g. because the versions
+    were read first.
+    """
+    rendered: List[Optional[Tuple[dict, bytes]]] = [_CASE_RESPONSES.get(r['case_id'], v) for r, v in zip(rows, versions)]
+    missing = [i for i, entry in enumerate(rendered) if entry is None]
+    if not missing:
+        return rendered
+    # resolve states for stage-less rows with one read instead of one per row
+    stageless = [rows[i]['case_id'] for i in missing if not rows[i].get('workflow_stage')]
+    states = workflow.get_states(stageless) if stageless else {}
+    for i in missing:
+        data = Case.model_validate(case_row_to_response(rows[i], states)).model_dump(mode='json')
+        rendered[i] = (data, _json_bytes(data))
+        if cacheable:
+            _CASE_RESPONSES.put(rows[i]['case_id'], versions[i], rendered[i])
+    return rendered
+
+
 # Mount static files for uploads
 app.mount("/uploads", StaticFiles(directory=UPLOADS), name="uploads")
 
@@ -81,87 +276,407 @@ app.mount("/uploads", StaticFiles(directory=UPLOADS), name="uploads")
 def health():
     return {"status": "ok"}
 
+@app.get('/metrics')
+def get_metrics():
+    """Request latency, storage I/O and stage transition metrics for this worker, in Prometheus text format."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+def _decode_cursor_param(after: Optional[str], **expected) -> dict:
+    """Decode an ``after`` cursor, checking each named entry has the expected type."""
+    if not after:
+        return {}
+    try:
+        cursor = decode_cursor(after)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    for key, kind in expected.items():
+        if not isinstance(cursor.get(key), kind):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return cursor
+
+
+def _parse_fields_param(fields: Optional[str], model) -> Optional[List[str]]:
+    try:
+        return parse_fields(fields, model.model_fields, always=[next(iter(model.model_fields))])
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """A 304 when the client already holds ``etag``; otherwise tag the response with it.
+
+    Take the ETag before reading any data: a write landing in between then
+    costs the client one extra full response, never a stale 304.
+    """
+    if versions.matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={'ETag': etag})
+    response.headers['ETag'] = etag
+    return None
+
+
+def _page_response(items: List[dict], response: Response, next_cursor: Optional[str], fields: Optional[List[str]]):
+    """Attach the next-page cursor; projected pages bypass response_model validation."""
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    if fields is not None:
+        return JSONResponse([project(item, fields) for item in items], headers={**response.headers, **headers})
+    response.headers.update(headers)
+    return items
+
+
 @app.get('/cases', response_model=List[Case])
-def list_cases():
-    workflow.normalize_case_file()
-    rows = workflow.load_cases()
-    return [case_row_to_response(r) for r in rows[::-1]]  # newest first
+def list_cases(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    stage: Optional[str] = None,
+    payer: Optional[str] = None,
+):
+    selected = _parse_fields_param(fields, Case)
+    cursor = _decode_cursor_param(after, id=str, pos=int)
+    etag = workflow.cases_etag()
+    not_modified = _not_modified(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    next_cursor = None
+    if limit is None and not cursor:
+        rows = workflow.find_cases(stage, payer)[::-1]  # newest first
+    else:
+        rows, last = workflow.page_cases(limit or MAX_PAGE_SIZE, cursor.get('id'), cursor.get('pos'), stage, payer)
+        if last:
+            next_cursor = encode_cursor({'id': last[0], 'pos': last[1]})
+    versions = workflow.case_versions(r['case_id'] for r in rows)
+    # any case written since the ETag was taken also changed the list's version;
+    # its row may then be older than its version, so nothing is cached this time
+    rendered = render_cases(rows, versions, cacheable=workflow.cases_etag() == etag)
+    headers = {**response.headers, **({NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {})}
+    if selected is not None:
+        return JSONResponse([project(data, selected) for data, _ in rendered], headers=headers)
+    # the pre-rendered JSON is joined as-is, skipping response_model validation
+    body = b'[' + b','.join(body for _, body in rendered) + b']'
+    return Response(body, media_type='application/json', headers=headers)
 
 @app.post('/cases', response_model=Case)
 def create_case(payload: CaseCreate):
     case_id = uid('case')
     now = now_iso()
     record = workflow.create_case_record(case_id, payload.title, payload.patient_name, payload.payer, now)
-    workflow.add_case(record)
-    workflow.initialize_case(case_id, payload.title)
-    return get_case(case_id)
+    with workflow.unit_of_work(case_id):
+        workflow.add_case(record)
+        workflow.initialize_case(case_id, payload.title)
+    return case_row_to_response(workflow.get_case_row(case_id))
+
+@app.post('/cases/import', response_model=ImportReport)
+async def import_cases(request: Request, format: Optional[str] = Query(None, pattern='^(csv|ndjson)$')):
+    """Bulk-create cases from a streamed CSV or NDJSON body.
+
+    Rows are validated as the body arrives and committed in batches of
+    IMPORT_BATCH_SIZE, so memory stays bounded and each batch costs one
+    append per file. Invalid rows are skipped and reported by line number.
+    """
+    fmt = format or format_for_content_type(request.headers.get('content-type'))
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass format=csv|ndjson")
+    importer = CaseImporter(fmt)
+    batch: List[dict] = []
+    received = 0
+
+    async def flush():
+        importer.imported += len(await run_in_threadpool(workflow.import_cases, batch[:]))
+        batch.clear()
+
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > settings.MAX_UPLOAD_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Import exceeds the {settings.MAX_UPLOAD_BYTES} byte limit; {importer.imported} rows were imported before it",
+                )
+            batch.extend(importer.feed(chunk))
+            if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                await flush()
+        batch.extend(importer.close())
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if batch:
+        await flush()
+    report = importer.report()
+    logger.info("Imported %s cases (%s failed) in %ss", report['imported'], report['failed'], report['elapsed_seconds'])
+    return report
 
 @app.get('/cases/{case_id}', response_model=Case)
-def get_case(case_id: str):
-    rows = workflow.load_cases()
-    for r in rows:
-        if r['case_id'] == case_id:
-            return case_row_to_response(r)
-    raise HTTPException(status_code=404, detail="Case not found")
+def get_case(case_id: str, request: Request, response: Response):
+    not_modified = _not_modified(request, response, workflow.case_etag(case_id))
+    if not_modified is not None:
+        return not_modified
+    versions = workflow.case_versions([case_id])
+    row = workflow.get_case_row(case_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Case not found")
+    (_, body), = render_cases([row], versions)
+    return Response(body, media_type='application/json', headers=dict(response.headers))
 
 @app.delete('/cases/{case_id}', status_code=204)
 def delete_case(case_id: str):
-    rows = workflow.load_cases()
-    if not any(r['case_id'] == case_id for r in rows):
+    if not workflow.case_exists(case_id):
         raise HTTPException(status_code=404, detail="Case not found")
     workflow.delete_case_data(case_id)
+    _CASE_RESPONSES.discard(case_id)
+    compaction.wake()
     return
 
+@app.post('/cases/batch-delete', response_model=CaseBatchDeleteResult)
+def delete_cases(payload: CaseBatchDelete):
+    deleted = workflow.delete_cases(payload.case_ids)
+    for case_id in deleted:
+        _CASE_RESPONSES.discard(case_id)
+    if deleted:
+        compaction.wake()
+    gone = set(deleted)
+    return {'deleted': deleted, 'not_found': [case_id for case_id in dict.fromkeys(payload.case_ids) if case_id not in gone]}
+
+@app.post('/cases/packages', response_model=CasePackageResult)
+def build_packages(payload: CasePackageRequest):
+    """Generate final reimbursement packages for many cases, rendered in parallel worker processes."""
+    built = workflow.build_final_packages(payload.case_ids)
+    return {
+        'packages': {case_id: [document_row_to_response(rec) for rec in recs] for case_id, recs in built.items()},
+        'not_found': [case_id for case_id in dict.fromkeys(payload.case_ids) if case_id not in built],
+    }
+
 @app.get('/cases/{case_id}/documents', response_model=List[Document])
-def list_documents(case_id: str):
-    rows = read_csv(DOCS_CSV)
-    return [document_row_to_response(r) for r in rows if r['case_id'] == case_id]
+def list_documents(case_id: str, request: Request, response: Response):
+    not_modified = _not_modified(request, response, workflow.documents_etag(case_id))
+    if not_modified is not None:
+        return not_modified
+    return [document_row_to_response(r) for r in workflow.list_documents(case_id)]
+
+async def _store_upload(request: Request) -> Tuple[MultipartUpload, BlobWriter]:
+    """Stream the ``file`` part of a multipart upload into an uncommitted blob.
+
+    Bodies whose Content-Length already rules them out are refused before
+    anything is read. Otherwise the body is parsed as it arrives and the file
+    bytes are hashed and written in the same pass, off the event loop, in
+    writes of about UPLOAD_CHUNK_SIZE; MAX_UPLOAD_BYTES is enforced as they
+    come in. Returns the parsed part and the writer holding its bytes; the
+    caller commits or aborts it.
+    """
+    too_large = HTTPException(status_code=413, detail=f"File exceeds the {settings.MAX_UPLOAD_BYTES} byte upload limit")
+    try:
+        declared = int(request.headers.get('content-length', ''))
+    except ValueError:
+        declared = None
+    if declared is not None and declared > settings.MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+        raise too_large
+    try:
+        upload = MultipartUpload(request.headers.get('content-type'))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    out: Optional[BlobWriter] = None
+    pending: List[bytes] = []
+    pending_size = 0
+    size = 0
+
+    async def take(data: List[bytes]):
+        nonlocal out, pending_size, size
+        if upload.found and out is None:
+            if not os.path.basename(upload.filename or ''):
+                raise HTTPException(status_code=400, detail="Invalid file name")
+            out = await run_in_threadpool(BLOBS.writer)
+        for piece in data:
+            size += len(piece)
+            if size > settings.MAX_UPLOAD_BYTES:
+                raise too_large
+            pending.append(piece)
+            pending_size += len(piece)
+
+    async def flush():
+        nonlocal pending_size
+        await run_in_threadpool(out.write_chunks, pending[:])
+        pending.clear()
+        pending_size = 0
+
+    try:
+        try:
+            async for chunk in request.stream():
+                await take(upload.feed(chunk))
+                if pending_size >= settings.UPLOAD_CHUNK_SIZE:
+                    await flush()
+            await take(upload.close())
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        if pending:
+            await flush()
+    except BaseException:
+        if out is not None:
+            await run_in_threadpool(out.abort)
+        raise
+    return upload, out
+
+
+def _record_upload(case_id: str, upload: MultipartUpload, out: BlobWriter) -> Optional[dict]:
+    """Link a streamed upload into the case and record its document row; None if the case was deleted meanwhile.
 
-@app.post('/cases/{case_id}/documents', response_model=Document)
-async def upload_document(case_id: str, file: UploadFile = File(...)):
+    The blob is committed and linked under the case's lock, so if the case is
+    gone by then the commit drops the row and removes the link.
+    """
+    filename = os.path.basename(upload.filename)
+    dst_path = os.path.join(UPLOADS, case_id, filename)
+    with workflow.unit_of_work(case_id) as uow:
+        try:
+            digest, size = out.commit(dst_path)
+        except BaseException:
+            out.abort()
+            raise
+        rec = {
+            'doc_id': uid('doc'),
+            'case_id': case_id,
+            'name': filename,
+            'type': upload.content_type or '',
+            'path': dst_path,
+            'uploaded_at': now_iso(),
+            'public_url': build_public_url(case_id, filename),
+            'sha256': digest,
+            'size': str(size),
+        }
+        workflow.record_document(rec)
+    # a dropped row means the case was deleted; the commit already removed the file again
+    return rec if any(doc is rec for doc in uow.documents) else None
+
+
+_UPLOAD_REQUEST_BODY = {
+    'required': True,
+    'content': {'multipart/form-data': {'schema': {
+        'type': 'object',
+        'properties': {'file': {'type': 'string', 'format': 'binary'}},
+        'required': ['file'],
+    }}},
+}
+
+
+@app.post('/cases/{case_id}/documents', response_model=Document, openapi_extra={'requestBody': _UPLOAD_REQUEST_BODY})
+async def upload_document(case_id: str, request: Request):
+    case_not_found = HTTPException(status_code=404, detail="Case not found")
+    if not await run_in_threadpool(workflow.case_exists, case_id):
+        raise case_not_found
     # save file
-    case_dir = os.path.join(UPLOADS, case_id)
-    ensure_dir(case_dir)
-    filename = os.path.basename(file.filename or '')
-    if not filename:
-        raise HTTPException(status_code=400, detail="Invalid file name")
-    dst_path = os.path.join(case_dir, filename)
-    with open(dst_path, 'wb') as out:
-        shutil.copyfileobj(file.file, out)
-    public_url = build_public_url(case_id, filename)
-    rec = {
-        'doc_id': uid('doc'),
-        'case_id': case_id,
-        'name': filename,
-        'type': file.content_type or '',
-        'path': dst_path,
-        'uploaded_at': now_iso(),
-        'public_url': public_url,
-    }
-    append_csv(DOCS_CSV, rec, rec.keys())
-    workflow.handle_document_upload(case_id, rec)
-    return document_row_to_response(rec)
+    upload, out = await _store_upload(request)
+    rec = await run_in_threadpool(_record_upload, case_id, upload, out)
+    if rec is None:
+        raise case_not_found
+    # eligibility, conversion and package generation run in the background;
+    # the case stage advances when the job finishes
+    try:
+        job = await run_in_threadpool(jobs.submit, 'document_upload', {'case_id': case_id, 'doc': rec}, case_id)
+    except jobs.QueueFull:
+        raise HTTPException(status_code=503, detail="Document processing queue is full; retry shortly")
+    return {**document_row_to_response(rec), 'job_id': job['job_id']}
+
+
+@app.get('/jobs/{job_id}', response_model=Job)
+def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get('/codes/search', response_model=List[AdaCode])
+def search_codes(q: str = Query(..., min_length=1), limit: int = Query(20, ge=1, le=100)):
+    """Autocomplete CDT codes by code prefix (``D71``) or description words (``resin crown``)."""
+    return workflow.search_ada_codes(q, limit)
+
+@app.get('/codes/status', response_model=CodeCatalogStatus)
+def code_catalog_status():
+    """Size of the loaded code catalog and its reload count and timings."""
+    return workflow.ada_code_catalog_metrics()
+
+def _sse_frame(event: dict) -> bytes:
+    data = event['data']
+    if event['event'] == 'case':
+        data = case_row_to_response(data)
+    payload = json.dumps(data, separators=(',', ':'))
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {payload}\n\n".encode('utf-8')
+
+
+def _sse_frames(batch: List[dict]) -> bytes:
+    return b''.join(_sse_frame(event) for event in batch)
+
+
+@app.get('/events')
+async def stream_events(request: Request, case_id: Optional[str] = None):
+    """Server-sent events for case changes, deletions and new messages.
+
+    Pass ``case_id`` to follow a single case. Reconnecting clients send
+    ``Last-Event-ID`` and receive the events they missed; a ``reset`` event
+    means that gap could not be replayed and the client should refetch.
+    """
+    last_event_id = request.headers.get('last-event-id')
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_id = None
+    sub, backlog = await run_in_threadpool(events.subscribe, asyncio.get_running_loop(), case_id, last_id)
+
+    async def stream():
+        try:
+            yield f"retry: {settings.SSE_RETRY_MS}\n\n".encode('ascii')
+            if backlog is None:
+                yield b"event: reset\ndata: {}\n\n"
+            if backlog:
+                yield await run_in_threadpool(_sse_frames, backlog)
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if event is events.CLOSED:
+                    return
+                # case frames may read the case's state file
+                yield await run_in_threadpool(_sse_frame, event) if event['event'] == 'case' else _sse_frame(event)
+        finally:
+            events.unsubscribe(sub)
+
+    return StreamingResponse(stream(), media_type='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.get('/export')
+def export_data(since: Optional[str] = None):
+    """Stream every case joined with its state, messages and documents as NDJSON."""
+    try:
+        since_at = export.parse_since(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid since timestamp")
+    return StreamingResponse(export.iter_ndjson(export.iter_records(since_at)), media_type='application/x-ndjson')
 
 @app.get('/cases/{case_id}/messages', response_model=List[Message])
-def list_messages(case_id: str):
-    rows = read_csv(MSGS_CSV)
-    # sort ascending by created_at
-    filtered = [r for r in rows if r['case_id'] == case_id]
-    filtered.sort(key=lambda r: r['created_at'])
-    return filtered
+def list_messages(
+    case_id: str,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    selected = _parse_fields_param(fields, Message)
+    cursor = _decode_cursor_param(after, seq=int)
+    not_modified = _not_modified(request, response, workflow.messages_etag(case_id))
+    if not_modified is not None:
+        return not_modified
+    # the message log returns rows in append (chronological) order
+    if limit is None and not cursor:
+        return _page_response(workflow.list_messages(case_id), response, None, selected)
+    rows, next_seq = workflow.page_messages(case_id, limit or MAX_PAGE_SIZE, cursor.get('seq'))
+    next_cursor = encode_cursor({'seq': next_seq}) if next_seq is not None else None
+    return _page_response(rows, response, next_cursor, selected)
 
 @app.post('/cases/{case_id}/chat', response_model=Message)
 def chat(case_id: str, payload: MessageCreate):
-    # append user message
-    user_row = {
-        'msg_id': uid('msg'),
-        'case_id': case_id,
-        'role': 'user',
-        'content': payload.content,
-        'created_at': now_iso(),
-    }
-    append_csv(MSGS_CSV, user_row, user_row.keys())
-    responses = workflow.handle_user_message(case_id, payload.content)
-    if not responses:
-        responses = [workflow.record_message(case_id, 'assistant', "I'm here if you need anything else for this case.")]
+    with workflow.unit_of_work(case_id):
+        workflow.record_message(case_id, 'user', payload.content)
+        responses = workflow.handle_user_message(case_id, payload.content)
+        if not responses:
+            responses = [workflow.record_message(case_id, 'assistant', "I'm here if you need anything else for this case.")]
     return responses[-1]
@@ -0,0 +1,172 @@
+"""Process-wide metrics rendered in the Prometheus text exposition format.
+
+Storage helpers wrap their file access in ``storage_op``, the HTTP middleware
+in ``main`` observes request latency per route, and ``workflow.set_state``
+counts stage transitions. ``GET /metrics`` renders everything with
+``render``. Values are per process: with several server workers, each scrape
+reports the worker that answered it.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from . import tracing
+from .settings import settings
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_DATA_DIR = os.path.abspath(settings.DATA_DIR)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # per label set: a count per bucket (not cumulative), then the sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * len(self.buckets), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(counts), total[0]) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Time to serve an HTTP request, by route template.',
+    ('method', 'route', 'status'),
+)
+STORAGE_OPERATIONS = Counter('storage_operations_total', 'Storage operations, by data file.', ('op', 'file'))
+STORAGE_BYTES = Counter('storage_bytes_total', 'Bytes read or written by storage operations.', ('op', 'file'))
+STORAGE_ROWS = Counter('storage_rows_total', 'Rows or records read or written by storage operations.', ('op', 'file'))
+STORAGE_SECONDS = Counter('storage_seconds_total', 'Time spent in storage operations.', ('op', 'file'))
+STAGE_TRANSITIONS = Counter(
+    'workflow_stage_transitions_total', 'Workflow stage changes committed by set_state.',
+    ('from_stage', 'to_stage'),
+)
+
+REGISTRY = [REQUEST_SECONDS, STORAGE_OPERATIONS, STORAGE_BYTES, STORAGE_ROWS, STORAGE_SECONDS, STAGE_TRANSITIONS]
+
+
+def _relative(path: str) -> str:
+    path = os.path.abspath(path)
+    return path[len(_DATA_DIR) + 1:] if path.startswith(_DATA_DIR + os.sep) else path
+
+
+def storage_label(path: str) -> str:
+    """The data file or directory a path belongs to, e.g. ``cases.csv`` or ``workflow_states``.
+
+    Per-case files collapse into their directory, keeping the label set small.
+    """
+    relative = _relative(path)
+    return relative.split(os.sep, 1)[0] if not os.path.isabs(relative) else os.path.basename(relative)
+
+
+class StorageOp:
+    """Sizes reported by the code inside a ``storage_op`` block."""
+
+    __slots__ = ('bytes', 'rows')
+
+    def __init__(self):
+        self.bytes = 0
+        self.rows = 0
+
+
+@contextmanager
+def storage_op(op: str, path: str) -> Iterator[StorageOp]:
+    """Time a storage operation on ``path``; the block sets ``bytes`` and ``rows`` on the yielded record."""
+    record = StorageOp()
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        elapsed = time.perf_counter() - started
+        labels = (op, storage_label(path))
+        STORAGE_OPERATIONS.inc(labels)
+        STORAGE_SECONDS.inc(labels, elapsed)
+        if record.bytes:
+            STORAGE_BYTES.inc(labels, record.bytes)
+        if record.rows:
+            STORAGE_ROWS.inc(labels, record.rows)
+        trace = tracing.current()
+        if trace is not None:
+            trace.record_storage(op, _relative(path), labels[1], record.rows, record.bytes, elapsed)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    REQUEST_SECONDS.observe((method, route, str(status)), seconds)
+
+
+def stage_transition(from_stage: str, to_stage: str):
+    STAGE_TRANSITIONS.inc((from_stage or 'none', to_stage))
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
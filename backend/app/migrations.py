@@ -0,0 +1,128 @@
+"""Versioned, one-time migrations for the CSV/JSON data directory.
+
+Run automatically on app startup, or manually with::
+
+    python -m app.migrations [--status]
+"""
+import argparse
+import json
+import logging
+import os
+from typing import Callable, Dict, List, Tuple
+
+from .settings import settings
+from .utils import atomic_write, file_lock, now_iso, read_csv, write_csv
+from . import workflow
+
+SCHEMA_VERSION_FILE = os.path.join(settings.DATA_DIR, 'schema_version.json')
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_legacy_cases():
+    """Rewrite cases.csv through canonical_case_row so legacy rows are repaired on disk."""
+    workflow.normalize_case_file()
+
+
+def _split_workflow_state_file():
+    """Move every case out of workflow_state.json into its own state shard."""
+    if not os.path.exists(workflow.WORKFLOW_STATE):
+        return
+    with open(workflow.WORKFLOW_STATE, 'r', encoding='utf-8') as f:
+        try:
+            states = json.load(f)
+        except json.JSONDecodeError:
+            logger.warning("Unreadable %s; starting with empty workflow states", workflow.WORKFLOW_STATE)
+            states = {}
+    workflow._save_states(states)
+    os.replace(workflow.WORKFLOW_STATE, workflow.WORKFLOW_STATE + '.migrated')
+    logger.info("Split %d workflow states into %s", len(states), workflow.WORKFLOW_STATE_DIR)
+
+
+def _looks_like_url(value: str) -> bool:
+    return value.startswith('/') or value.startswith('http://') or value.startswith('https://')
+
+
+def _add_document_checksum_columns():
+    """Rewrite documents.csv with the sha256/size columns.
+
+    Rows appended before the header order was respected may have
+    ``uploaded_at`` and ``public_url`` swapped; those are put back.
+    """
+    if not os.path.exists(workflow.DOCS_CSV):
+        return
+    with file_lock(workflow.DOCS_CSV):
+        rows = []
+        for row in read_csv(workflow.DOCS_CSV):
+            fixed = {field: (row.get(field) or '') for field in workflow.DOCUMENT_FIELD_ORDER}
+            if _looks_like_url(fixed['uploaded_at']) and not _looks_like_url(fixed['public_url']):
+                fixed['uploaded_at'], fixed['public_url'] = fixed['public_url'], fixed['uploaded_at']
+            rows.append(fixed)
+        write_csv(workflow.DOCS_CSV, rows, workflow.DOCUMENT_FIELD_ORDER)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[], None]]] = [
+    (1, 'normalize legacy case rows', _normalize_legacy_cases),
+    (2, 'split workflow_state.json into per-case state files', _split_workflow_state_file),
+    (3, 'add sha256/size columns to documents.csv', _add_document_checksum_columns),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def read_schema_version() -> Dict:
+    if not os.path.exists(SCHEMA_VERSION_FILE):
+        return {'version': 0, 'applied': []}
+    with open(SCHEMA_VERSION_FILE, 'r', encoding='utf-8') as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError:
+            return {'version': 0, 'applied': []}
+
+
+def _write_schema_version(info: Dict):
+    with atomic_write(SCHEMA_VERSION_FILE, 'w', encoding='utf-8') as f:
+        json.dump(info, f, indent=2)
+
+
+def run_migrations() -> int:
+    """Apply every pending migration in order and return the resulting schema version.
+
+    Runs under a lock on the version file, so when several workers start
+    together one migrates and the others then find nothing left to do.
+    """
+    with file_lock(SCHEMA_VERSION_FILE):
+        info = read_schema_version()
+        current = int(info.get('version', 0))
+        started = current
+        for version, name, fn in MIGRATIONS:
+            if version <= current:
+                continue
+            logger.info("Applying data migration %s: %s", version, name)
+            fn()
+            current = version
+            info['version'] = version
+            info.setdefault('applied', []).append({'version': version, 'name': name, 'applied_at': now_iso()})
+            _write_schema_version(info)
+        if current != started:
+            # rewritten files must not answer conditional requests with ETags from before
+            workflow.reset_versions()
+    return current
+
+
+def main(argv: List[str] | None = None):
+    parser = argparse.ArgumentParser(description='Migrate the backend data directory to the current schema version.')
+    parser.add_argument('--status', action='store_true', help='print the recorded schema version and exit')
+    args = parser.parse_args(argv)
+
+    if args.status:
+        info = read_schema_version()
+        print(f"schema version {info.get('version', 0)} (latest {SCHEMA_VERSION}) in {settings.DATA_DIR}")
+        return
+    logging.basicConfig(level=logging.INFO)
+    version = run_migrations()
+    print(f"data directory {settings.DATA_DIR} is at schema version {version}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from pydantic import BaseModel
+from typing import Dict, List, Optional, Literal
 
 class CaseCreate(BaseModel):
     title: str
@@ -39,3 +39,56 @@ class Document(BaseModel):
     path: str
     uploaded_at: str
     public_url: Optional[str] = None
+    sha256: Optional[str] = None
+    size: Optional[int] = None
+    job_id: Optional[str] = None
+
+class Job(BaseModel):
+    job_id: str
+    kind: str
+    key: Optional[str] = None
+    status: Literal['queued', 'running', 'succeeded', 'failed']
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+class ImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool
+    elapsed_seconds: float
+    rows_per_second: Optional[float] = None
+
+class CaseBatchDelete(BaseModel):
+    case_ids: List[str]
+
+class CaseBatchDeleteResult(BaseModel):
+    deleted: List[str]
+    not_found: List[str]
+
+class AdaCode(BaseModel):
+    code: str
+    description: str
+    category: Optional[str] = None
+
+class CodeCatalogStatus(BaseModel):
+    path: str
+    codes: int
+    reloads: int
+    failures: int
+    last_reload_ms: Optional[float] = None
+    total_reload_ms: float
+    loaded_at: Optional[float] = None
+
+class CasePackageRequest(BaseModel):
+    case_ids: List[str]
+
+class CasePackageResult(BaseModel):
+    packages: Dict[str, List[Document]]
+    not_found: List[str]
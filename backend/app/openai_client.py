@@ -1,16 +1,120 @@
-import os
+"""Process-wide OpenAI / Azure OpenAI clients.
+
+Clients are built once and reused so their keep-alive connection pools
+(``LLM_MAX_CONNECTIONS`` / ``LLM_MAX_KEEPALIVE_CONNECTIONS``) are shared by
+every caller. ``get_openai_client`` returns the sync client for request
+threads; ``get_async_openai_client`` returns an async client for the event
+loop it is called from (async connections belong to the loop that opened
+them). ``chat_completion`` and ``achat_completion`` run a chat completion
+with at most ``LLM_MAX_CONCURRENCY`` calls in flight per client, so a burst of
+requests queues here instead of opening a connection each. Point
+``OPENAI_BASE_URL`` at ``python -m benchmarks.llm_standin`` to run offline.
+"""
+import asyncio
+import threading
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from openai import AsyncAzureOpenAI, AsyncOpenAI, AzureOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
 from .settings import settings
-from openai import OpenAI, AzureOpenAI
 
-def get_openai_client():
+AZURE_API_VERSION = "2024-06-01"
+
+_LOCK = threading.Lock()
+_CLIENT: Optional[Tuple[OpenAI, str, bool]] = None
+_SLOTS = threading.BoundedSemaphore(max(1, settings.LLM_MAX_CONCURRENCY))
+# per event loop: (client, model, is_azure, concurrency semaphore)
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[AsyncOpenAI, str, bool, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def _client_options(is_async: bool) -> Tuple[type, Dict, str, bool]:
+    """The client class, its keyword arguments, the model and whether it is Azure."""
+    is_azure = bool(settings.AZURE_OPENAI_ENDPOINT and settings.AZURE_OPENAI_API_KEY and settings.AZURE_OPENAI_DEPLOYMENT)
+    if not is_azure and not settings.OPENAI_API_KEY:
+        raise RuntimeError("OPENAI_API_KEY not configured")
+    http_client = (DefaultAsyncHttpxClient if is_async else DefaultHttpxClient)(timeout=_timeout(), limits=_limits())
+    common = {'timeout': _timeout(), 'max_retries': settings.LLM_MAX_RETRIES, 'http_client': http_client}
     # Prefer Azure if endpoint provided
-    if settings.AZURE_OPENAI_ENDPOINT and settings.AZURE_OPENAI_API_KEY and settings.AZURE_OPENAI_DEPLOYMENT:
-        return AzureOpenAI(
-            api_key=settings.AZURE_OPENAI_API_KEY,
-            api_version="2024-06-01",
-            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
-        ), settings.AZURE_OPENAI_DEPLOYMENT, True
+    if is_azure:
+        cls = AsyncAzureOpenAI if is_async else AzureOpenAI
+        options = {'api_key': settings.AZURE_OPENAI_API_KEY, 'api_version': AZURE_API_VERSION,
+                   'azure_endpoint': settings.AZURE_OPENAI_ENDPOINT, **common}
+        return cls, options, settings.AZURE_OPENAI_DEPLOYMENT, True
     # Default to OpenAI
-    if not settings.OPENAI_API_KEY:
-        raise RuntimeError("OPENAI_API_KEY not configured")
-    return OpenAI(api_key=settings.OPENAI_API_KEY), "gpt-4o-mini", False
+    cls = AsyncOpenAI if is_async else OpenAI
+    options = {'api_key': settings.OPENAI_API_KEY, 'base_url': settings.OPENAI_BASE_URL, **common}
+    return cls, options, settings.OPENAI_MODEL, False
+
+
+def get_openai_client() -> Tuple[OpenAI, str, bool]:
+    """The shared sync client, with the model (or Azure deployment) to call and whether it is Azure."""
+    global _CLIENT
+    client = _CLIENT
+    if client is not None:
+        return client
+    with _LOCK:
+        if _CLIENT is None:
+            cls, options, model, is_azure = _client_options(is_async=False)
+            _CLIENT = (cls(**options), model, is_azure)
+        return _CLIENT
+
+
+def _async_entry() -> Tuple[AsyncOpenAI, str, bool, asyncio.Semaphore]:
+    loop = asyncio.get_running_loop()
+    entry = _ASYNC_CLIENTS.get(loop)
+    if entry is None:
+        cls, options, model, is_azure = _client_options(is_async=True)
+        entry = _ASYNC_CLIENTS[loop] = (cls(**options), model, is_azure, asyncio.Semaphore(max(1, settings.LLM_MAX_CONCURRENCY)))
+    return entry
+
+
+def get_async_openai_client() -> Tuple[AsyncOpenAI, str, bool]:
+    """Like ``get_openai_client``, for the running event loop; must be called from inside it."""
+    client, model, is_azure, _ = _async_entry()
+    return client, model, is_azure
+
+
+def chat_completion(messages: List[Dict], **kwargs):
+    """Create a chat completion with the shared sync client, waiting for a free concurrency slot."""
+    client, model, _ = get_openai_client()
+    with _SLOTS:
+        return client.chat.completions.create(model=model, messages=messages, **kwargs)
+
+
+async def achat_completion(messages: List[Dict], **kwargs):
+    """Async ``chat_completion`` on the running loop's client."""
+    client, model, _, slots = _async_entry()
+    async with slots:
+        return await client.chat.completions.create(model=model, messages=messages, **kwargs)
+
+
+def close_client():
+    """Close the shared sync client's connections; the next call builds a new client."""
+    global _CLIENT
+    with _LOCK:
+        client, _CLIENT = _CLIENT, None
+    if client is not None:
+        client[0].close()
+
+
+async def aclose_async_client():
+    """Close the running loop's async client, if one was created."""
+    try:
+        entry = _ASYNC_CLIENTS.pop(asyncio.get_running_loop())
+    except KeyError:
+        return
+    await entry[0].close()
@@ -0,0 +1,79 @@
+"""Parallel rendering of generated case artifacts.
+
+An artifact is a dict describing one generated file::
+
+    {'filename': ..., 'format': 'pdf' | 'text', 'content': ..., 'doc_type': ...,
+     'closing_lines': [...], 'rule_y': ...}   # the last two for PDFs only
+
+``PackageBuilder.render`` renders a list of artifacts, for one case or many,
+in a process pool. Each worker streams its output straight into the blob
+store and returns only ``(sha256, size)``, so rendered bytes never cross
+process boundaries. This module deliberately imports nothing from
+``workflow``, which keeps worker start-up cheap.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+from .blob_store import BlobStore
+from .pdf import write_text_pdf
+
+logger = logging.getLogger(__name__)
+
+
+def render_artifact(blobs_dir: str, artifact: Dict, link_to: Optional[str] = None) -> Tuple[str, int]:
+    """Render one artifact into the blob store, optionally linking it at ``link_to``; returns its sha256 and size."""
+    blobs = BlobStore(blobs_dir)
+    if artifact['format'] == 'pdf':
+        return blobs.put_stream(
+            lambda out: write_text_pdf(out, artifact['content'], artifact.get('closing_lines'), artifact.get('rule_y')),
+            link_to,
+        )
+    return blobs.put_bytes(artifact['content'].encode('utf-8'), link_to)
+
+
+class PackageBuilder:
+    """Renders artifacts in a lazily started pool of ``workers`` processes.
+
+    With ``workers`` of 1 or less, or for a single artifact, rendering runs in
+    the calling thread. Workers are spawned rather than forked, since the app
+    process runs many threads.
+    """
+
+    def __init__(self, blobs_dir: str, workers: int):
+        self.blobs_dir = blobs_dir
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            return self._executor
+
+    def render(self, artifacts: List[Dict]) -> List[Tuple[str, int]]:
+        """Render every artifact, returning ``(sha256, size)`` in the same order."""
+        render = partial(render_artifact, self.blobs_dir)
+        if self.workers <= 1 or len(artifacts) <= 1:
+            return [render(artifact) for artifact in artifacts]
+        chunksize = max(1, len(artifacts) // (self.workers * 4))
+        try:
+            return list(self._pool().map(render, artifacts, chunksize=chunksize))
+        except BrokenProcessPool:
+            logger.warning("Package worker pool broke; rendering %d artifacts in-process", len(artifacts))
+            self.shutdown(wait=False)
+            return [render(artifact) for artifact in artifacts]
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,44 @@
+import base64
+import binascii
+import json
+from typing import Dict, Iterable, List, Optional
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(payload: Dict) -> str:
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """Decode a cursor produced by ``encode_cursor``; raises ValueError if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, json.JSONDecodeError) as exc:
+        raise ValueError('invalid cursor') from exc
+    if not isinstance(payload, dict):
+        raise ValueError('invalid cursor')
+    return payload
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str], always: Iterable[str] = ()) -> Optional[List[str]]:
+    """Parse a comma-separated ``fields=`` projection; raises ValueError on unknown names."""
+    if not fields:
+        return None
+    allowed = set(allowed)
+    selected = list(always)
+    for name in (part.strip() for part in fields.split(',')):
+        if not name:
+            continue
+        if name not in allowed:
+            raise ValueError(f"unknown field '{name}'")
+        if name not in selected:
+            selected.append(name)
+    return selected
+
+
+def project(row: Dict, fields: List[str]) -> Dict:
+    return {name: row.get(name) for name in fields}
@@ -0,0 +1,190 @@
+"""Minimal streaming PDF writer for generated case documents.
+
+Pages are written to the output as soon as they are laid out, with byte
+offsets tracked as they go, so the cross-reference table is always correct
+and only one page is held in memory. Text is set in the built-in Helvetica
+font, wrapped to the page width and continued onto new pages as needed.
+"""
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+PAGE_WIDTH = 612   # US Letter, in points
+PAGE_HEIGHT = 792
+MARGIN = 72
+FONT_SIZE = 11
+LEADING = 16
+RULE_LENGTH = 288
+
+# Fixed objects shared by every document: 1 is the catalog, 2 the page tree
+# and 3 the font. They never change, so they are rendered once at import.
+CATALOG_ID = 1
+PAGES_ID = 2
+FONT_ID = 3
+_HEADER = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+_CATALOG_OBJECT = f'<< /Type /Catalog /Pages {PAGES_ID} 0 R >>'.encode('ascii')
+_FONT_OBJECT = b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>'
+_PAGE_OBJECT = (
+    f'<< /Type /Page /Parent {PAGES_ID} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+    f'/Resources << /Font << /F1 {FONT_ID} 0 R >> >> /Contents %d 0 R >>'
+)
+
+# Helvetica advance widths (1/1000 em) for printable ASCII, from the standard AFM metrics
+_HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,  # space - /
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,  # 0 - ?
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,  # @ - O
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,  # P - _
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,  # ` - o
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,  # p - ~
+]
+_DEFAULT_WIDTH = 556
+_WIDTHS: Dict[str, int] = {chr(32 + i): width for i, width in enumerate(_HELVETICA_WIDTHS)}
+
+
+def text_width(text: str, font_size: float = FONT_SIZE) -> float:
+    return sum(_WIDTHS.get(ch, _DEFAULT_WIDTH) for ch in text) * font_size / 1000
+
+
+def wrap_line(line: str, max_width: float, font_size: float = FONT_SIZE) -> List[str]:
+    """Break one line of text into pieces no wider than ``max_width``, keeping its indentation."""
+    line = line.rstrip().expandtabs(4)
+    if text_width(line, font_size) <= max_width:
+        return [line]
+    indent = line[:len(line) - len(line.lstrip())]
+    pieces: List[str] = []
+    current = indent
+    for word in line.split():
+        candidate = f'{current} {word}' if current.strip() else current + word
+        if text_width(candidate, font_size) <= max_width:
+            current = candidate
+            continue
+        if current.strip():
+            pieces.append(current)
+            current = indent + word
+        else:
+            current = candidate
+        # a single word wider than the line is split by characters
+        while text_width(current, font_size) > max_width:
+            cut = len(current) - 1
+            while cut > len(indent) + 1 and text_width(current[:cut], font_size) > max_width:
+                cut -= 1
+            pieces.append(current[:cut])
+            current = indent + current[cut:]
+    if current.strip():
+        pieces.append(current)
+    return pieces
+
+
+def _escape(text: str) -> bytes:
+    raw = text.encode('cp1252', errors='replace')
+    return raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+class PdfWriter:
+    """Write a PDF to a binary stream one page at a time.
+
+    Call ``add_page`` with each page's content stream, then ``close`` to write
+    the page tree, cross-reference table and trailer. The output stream is
+    never seeked, so it can be a plain file, a socket or a hashing wrapper.
+    """
+
+    def __init__(self, out: BinaryIO):
+        self.out = out
+        self.position = 0
+        self._offsets: Dict[int, int] = {}
+        self._pages: List[int] = []
+        self._next_id = FONT_ID + 1
+        self._closed = False
+        self._write(_HEADER)
+        self._write_object(FONT_ID, _FONT_OBJECT)
+
+    def _write(self, data: bytes):
+        self.out.write(data)
+        self.position += len(data)
+
+    def _write_object(self, obj_id: int, body: bytes):
+        self._offsets[obj_id] = self.position
+        self._write(b'%d 0 obj\n' % obj_id + body + b'\nendobj\n')
+
+    def _allocate(self) -> int:
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    def add_page(self, content: bytes):
+        content_id = self._allocate()
+        page_id = self._allocate()
+        self._write_object(content_id, b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+        self._write_object(page_id, (_PAGE_OBJECT % content_id).encode('ascii'))
+        self._pages.append(page_id)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self._pages)
+        self._write_object(PAGES_ID, f'<< /Type /Pages /Kids [{kids}] /Count {len(self._pages)} >>'.encode('ascii'))
+        self._write_object(CATALOG_ID, _CATALOG_OBJECT)
+        xref_offset = self.position
+        size = self._next_id
+        entries = [b'0000000000 65535 f \n']
+        for obj_id in range(1, size):
+            entries.append(b'%010d 00000 n \n' % self._offsets[obj_id])
+        self._write(b'xref\n0 %d\n' % size + b''.join(entries))
+        self._write(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (size, CATALOG_ID, xref_offset))
+
+
+def _text_block(lines: Iterable[str], x: float, y: float) -> bytes:
+    ops = [b'BT', b'/F1 %d Tf' % FONT_SIZE, b'%d TL' % LEADING, b'%g %g Td' % (x, y)]
+    for line in lines:
+        ops.append(b'(' + _escape(line) + b') Tj T*')
+    ops.append(b'ET')
+    return b'\n'.join(ops)
+
+
+def _layout(text: str, first_y: float, bottom_y: float) -> Iterator[Tuple[List[str], float]]:
+    """Yield ``(lines, next_y)`` for each page of wrapped ``text``."""
+    max_width = PAGE_WIDTH - 2 * MARGIN
+    page: List[str] = []
+    y = first_y
+    for raw_line in text.splitlines():
+        for line in wrap_line(raw_line, max_width):
+            if y < bottom_y:
+                yield page, y
+                page, y = [], first_y
+            page.append(line)
+            y -= LEADING
+    yield page, y
+
+
+def write_text_pdf(out: BinaryIO, text: str, closing_lines: Optional[List[str]] = None, rule_y: Optional[float] = None) -> int:
+    """Lay ``text`` out over as many pages as it needs and stream the PDF to ``out``.
+
+    ``closing_lines`` (e.g. a signature block) are placed at the bottom of the
+    last page, above a rule at ``rule_y``; a new page is started when the text
+    leaves no room for them. Returns the number of pages written.
+    """
+    writer = PdfWriter(out)
+    top = PAGE_HEIGHT - MARGIN
+    closing_lines = closing_lines or []
+    closing_top = (rule_y or MARGIN) + LEADING * (len(closing_lines) + 1)
+    pending: Optional[Tuple[List[str], float]] = None
+    for page in _layout(text, top, MARGIN):
+        if pending is not None:
+            writer.add_page(_text_block(pending[0], MARGIN, top))
+        pending = page
+    lines, next_y = pending
+    if closing_lines and next_y < closing_top:
+        writer.add_page(_text_block(lines, MARGIN, top))
+        lines = []
+    content = _text_block(lines, MARGIN, top)
+    if closing_lines:
+        content += b'\n' + _text_block(closing_lines, MARGIN, closing_top - LEADING)
+        if rule_y is not None:
+            content += b'\n%g %g m %g %g l S' % (MARGIN, rule_y, MARGIN + RULE_LENGTH, rule_y)
+    writer.add_page(content)
+    writer.close()
+    return writer.page_count
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal
 import os
 
 class Settings(BaseSettings):
@@ -10,8 +10,59 @@ class Settings(BaseSettings):
     AZURE_OPENAI_ENDPOINT: str | None = None
     AZURE_OPENAI_DEPLOYMENT: str | None = None
 
+    # OpenAI endpoint and model (point the base URL at a compatible server, e.g. benchmarks.llm_standin)
+    OPENAI_BASE_URL: str | None = None
+    OPENAI_MODEL: str = "gpt-4o-mini"
+
+    # Shared LLM clients: concurrent calls per client, connection pool size and per-call timeouts
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_MAX_RETRIES: int = 2
+
     DATA_DIR: str = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
     ALLOWED_ORIGINS: List[str] = ["*"]  # tighten in prod
     PUBLIC_BASE_URL: str | None = None
+    # CDT code catalog (code, description and optional category columns); defaults to DATA_DIR/ada_codes.csv
+    ADA_CODES_FILE: str | None = None
+    ADA_CODES_RELOAD_INTERVAL_SECONDS: float = 5.0
+
+    # Uploads are streamed to disk in chunks of this size and rejected past the limit
+    MAX_UPLOAD_BYTES: int = 512 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+
+    # Bulk case imports are validated as they stream in and written in batches of this many rows
+    IMPORT_BATCH_SIZE: int = 500
+
+    # Background jobs (document-driven workflow transitions)
+    JOB_WORKERS: int = 4
+    JOB_QUEUE_LIMIT: int = 1000
+    JOB_RETENTION_SECONDS: int = 7 * 24 * 3600
+
+    # Worker processes for rendering generated documents (PDFs, package summaries); 1 or less renders in-process
+    PACKAGE_WORKERS: int = min(4, os.cpu_count() or 1)
+
+    # Rendered case responses kept for reuse while their case is unchanged
+    CASE_RESPONSE_CACHE_SIZE: int = 10000
+
+    # Server-sent events: keep-alive comment interval and the reconnect delay suggested to clients
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+    SSE_RETRY_MS: int = 3000
+    # Events go through DATA_DIR/events.log so every worker sees them; workers other than the
+    # publisher notice new events within SSE_POLL_INTERVAL_SECONDS, and the log keeps its newer half past the size cap
+    SSE_POLL_INTERVAL_SECONDS: float = 0.25
+    EVENT_LOG_MAX_BYTES: int = 4 * 1024 * 1024
+
+    # Per-request storage tracing: 'off', 'header' (requests sending X-Request-Trace: 1) or 'all';
+    # traced requests get a Server-Timing header, and a cProfile dump when REQUEST_PROFILE_DIR is set
+    REQUEST_TRACING: Literal['off', 'header', 'all'] = 'off'
+    REQUEST_PROFILE_DIR: str | None = None
+
+    # Deleted cases are tombstoned at once and physically removed by a background compactor
+    COMPACTION_INTERVAL_SECONDS: float = 30.0
+    COMPACTION_BATCH_SIZE: int = 500
 
 settings = Settings()
@@ -0,0 +1,115 @@
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from .metrics import storage_op
+from .utils import atomic_write
+
+
+class StateStore:
+    """Workflow state kept as one small JSON file per case.
+
+    Reading or writing a case touches only that case's file, so the cost of a
+    state change is proportional to its own context rather than to the number
+    of cases on disk. Batch reads (``get_many``) keep parsed shards in memory
+    and only re-read the ones that changed.
+    """
+
+    SUFFIX = '.json'
+    # shards younger than this are re-read by get_many instead of indexed
+    SETTLE_NS = 2 * 10**9
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        # case_id -> (shard signature, parsed state), filled by get_many
+        self._index: Dict[str, Tuple[Tuple[int, int, int], Dict]] = {}
+
+    def path_for(self, case_id: str) -> str:
+        return os.path.join(self.directory, quote(case_id, safe='') + self.SUFFIX)
+
+    @staticmethod
+    def _load(path: str) -> Tuple[Optional[Dict], int]:
+        """The parsed state in ``path`` (None if missing or unreadable) and the bytes read."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+                return state, f.tell()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None, 0
+
+    def get(self, case_id: str) -> Optional[Dict]:
+        path = self.path_for(case_id)
+        with storage_op('read', path) as op:
+            state, op.bytes = self._load(path)
+            op.rows = 1 if state is not None else 0
+            return state
+
+    def put(self, case_id: str, state: Dict):
+        path = self.path_for(case_id)
+        with storage_op('write', path) as op, atomic_write(path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, separators=(',', ':'))
+            op.bytes = f.tell()
+            op.rows = 1
+
+    def delete(self, case_id: str) -> bool:
+        path = self.path_for(case_id)
+        self._index.pop(case_id, None)
+        with storage_op('delete', path):
+            try:
+                os.remove(path)
+                return True
+            except FileNotFoundError:
+                return False
+
+    def case_ids(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return [
+            unquote(name[:-len(self.SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.endswith(self.SUFFIX)
+        ]
+
+    def get_many(self, case_ids: Iterable[str]) -> Dict[str, Dict]:
+        """States of the ``case_ids`` that have one, served from an in-memory index of the shards.
+
+        Each shard is stat'ed and parsed again only when its (inode, mtime,
+        size) signature differs from the indexed one; writes rename a new file
+        into place, so every rewrite changes the signature. Shards modified in
+        the last ``SETTLE_NS`` are re-read each time rather than indexed, since
+        a second write within the filesystem's timestamp granularity could
+        reuse the signature. The returned states are shared with the index and
+        must not be modified.
+        """
+        states: Dict[str, Dict] = {}
+        now = time.time_ns()
+        with storage_op('read', self.directory) as op:
+            for case_id in case_ids:
+                path = self.path_for(case_id)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    self._index.pop(case_id, None)
+                    continue
+                signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+                entry = self._index.get(case_id)
+                if entry is not None and entry[0] == signature:
+                    states[case_id] = entry[1]
+                    continue
+                state, nbytes = self._load(path)
+                op.rows += 1
+                op.bytes += nbytes
+                if state is None:
+                    self._index.pop(case_id, None)
+                    continue
+                if now - st.st_mtime_ns > self.SETTLE_NS:
+                    self._index[case_id] = (signature, state)
+                else:
+                    self._index.pop(case_id, None)
+                states[case_id] = state
+        return states
+
+    def load_all(self) -> Dict[str, Dict]:
+        return self.get_many(self.case_ids())
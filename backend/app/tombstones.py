@@ -0,0 +1,89 @@
+import os
+import threading
+from typing import Iterable, List, Optional, Set, Tuple
+from urllib.parse import quote, unquote
+
+from .utils import atomic_write, ensure_dir, file_lock
+
+
+class TombstoneSet:
+    """Ids of deleted cases whose data has not been compacted away yet.
+
+    The set is an append-only file with one quoted id per line, so a delete is
+    a single small append that every worker process sees on its next read.
+    Readers skip tombstoned cases; the compactor removes their rows and files
+    in batches and then drops the ids with ``discard_many``. Writers take the
+    file lock before the in-process lock, the same order as the compactor,
+    which holds the file lock around its reads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._ids: Set[str] = set()
+        self._signature: Optional[Tuple[int, int]] = None
+        self._read_pos = 0
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size)
+
+    def _refresh(self):
+        signature = self._stat()
+        if signature == self._signature:
+            return
+        if signature is None:
+            self._ids = set()
+            self._read_pos = 0
+        else:
+            if self._signature is None or signature[0] != self._signature[0] or signature[1] < self._read_pos:
+                # rewritten by a compaction; read it again from the start
+                self._ids = set()
+                self._read_pos = 0
+            with open(self.path, 'r', encoding='utf-8') as f:
+                f.seek(self._read_pos)
+                for line in iter(f.readline, ''):
+                    if not line.endswith('\n'):
+                        break  # partially written line; picked up next time
+                    self._ids.add(unquote(line.rstrip('\n')))
+                    self._read_pos = f.tell()
+        self._signature = signature
+
+    def __contains__(self, case_id: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return case_id in self._ids
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._ids)
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            self._refresh()
+            return sorted(self._ids)
+
+    def add_many(self, case_ids: Iterable[str]):
+        with file_lock(self.path), self._lock:
+            self._refresh()
+            new = [case_id for case_id in dict.fromkeys(case_ids) if case_id not in self._ids]
+            if not new:
+                return
+            ensure_dir(os.path.dirname(self.path))
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(''.join(quote(case_id, safe='') + '\n' for case_id in new))
+            self._refresh()
+
+    def discard_many(self, case_ids: Iterable[str]):
+        with file_lock(self.path), self._lock:
+            self._refresh()
+            keep = self._ids - set(case_ids)
+            if keep == self._ids:
+                return
+            with atomic_write(self.path, 'w', encoding='utf-8') as f:
+                f.write(''.join(quote(case_id, safe='') + '\n' for case_id in sorted(keep)))
+            self._refresh()
@@ -0,0 +1,168 @@
+"""Opt-in per-request tracing of storage operations and workflow calls.
+
+When a request is traced, every ``metrics.storage_op`` it triggers is also
+recorded on the request's ``RequestTrace`` (found through a context
+variable, so work handed to the threadpool is included), and its endpoint
+runs under ``cProfile`` so the workflow functions it called can be listed.
+The middleware in ``main`` summarises the trace in a ``Server-Timing``
+header, logs the full trace and, when ``REQUEST_PROFILE_DIR`` is set, dumps
+the profile as a pstats file next to a JSON copy of the trace. Work done by
+background jobs or package worker processes is not attributed to the
+request.
+"""
+import cProfile
+import functools
+import inspect
+import json
+import os
+import pstats
+import re
+import time
+from contextvars import ContextVar, Token
+from typing import Callable, Dict, List, Optional, Tuple
+
+_CURRENT: ContextVar[Optional['RequestTrace']] = ContextVar('request_trace', default=None)
+_UNSAFE_TOKEN_CHARS = re.compile(r'[^A-Za-z0-9_.-]+')
+WORKFLOW_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'workflow.py')
+
+
+class RequestTrace:
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.started = time.perf_counter()
+        self.elapsed: Optional[float] = None
+        self.storage: List[Dict] = []
+        self.profile: Optional[pstats.Stats] = None
+
+    def record_storage(self, op: str, path: str, label: str, rows: int, nbytes: int, seconds: float):
+        self.storage.append({'op': op, 'file': path, 'label': label, 'rows': rows, 'bytes': nbytes, 'ms': round(seconds * 1000, 3)})
+
+    def add_profile(self, profiler: cProfile.Profile):
+        if self.profile is None:
+            self.profile = pstats.Stats(profiler)
+        else:
+            self.profile.add(profiler)
+
+    def finish(self):
+        if self.elapsed is None:
+            self.elapsed = time.perf_counter() - self.started
+
+    def storage_totals(self) -> List[Tuple[str, str, Dict]]:
+        """Storage operations grouped by ``(op, label)``, slowest group first."""
+        totals: Dict[Tuple[str, str], Dict] = {}
+        for entry in self.storage:
+            total = totals.setdefault((entry['op'], entry['label']), {'count': 0, 'rows': 0, 'bytes': 0, 'ms': 0.0})
+            total['count'] += 1
+            total['rows'] += entry['rows']
+            total['bytes'] += entry['bytes']
+            total['ms'] += entry['ms']
+        return sorted(((op, label, total) for (op, label), total in totals.items()), key=lambda item: -item[2]['ms'])
+
+    def workflow_calls(self) -> List[Dict]:
+        """Workflow functions the endpoint called, by cumulative time."""
+        if self.profile is None:
+            return []
+        calls = [
+            {'function': name, 'calls': nc, 'ms': round(cumulative * 1000, 3)}
+            for (filename, _, name), (_, nc, _, cumulative, _) in self.profile.stats.items()
+            if filename == WORKFLOW_FILE
+        ]
+        return sorted(calls, key=lambda call: -call['ms'])
+
+    def server_timing(self) -> str:
+        metrics = []
+        for op, label, total in self.storage_totals():
+            name = _UNSAFE_TOKEN_CHARS.sub('_', f'{op}.{label}')
+            desc = f"{total['count']} ops, {total['rows']} rows, {total['bytes']} B"
+            metrics.append(f'{name};dur={total["ms"]:.3f};desc="{desc}"')
+        storage_ms = sum(entry['ms'] for entry in self.storage)
+        metrics.append(f'storage;dur={storage_ms:.3f};desc="{len(self.storage)} ops"')
+        calls = self.workflow_calls()
+        if calls:
+            metrics.append(f'workflow;desc="{sum(call["calls"] for call in calls)} calls"')
+        self.finish()
+        metrics.append(f'total;dur={self.elapsed * 1000:.3f}')
+        return ', '.join(metrics)
+
+    def to_dict(self) -> Dict:
+        self.finish()
+        return {
+            'method': self.method,
+            'path': self.path,
+            'route': self.route,
+            'ms': round(self.elapsed * 1000, 3),
+            'storage': self.storage,
+            'workflow_calls': self.workflow_calls(),
+        }
+
+    def dump(self, directory: str) -> str:
+        """Write ``<name>.prof`` (pstats) and ``<name>.json`` (the trace) to ``directory``; returns the base path."""
+        os.makedirs(directory, exist_ok=True)
+        route = _UNSAFE_TOKEN_CHARS.sub('_', (self.route or self.path).strip('/')) or 'root'
+        base = os.path.join(directory, f'{time.strftime("%Y%m%dT%H%M%S")}-{os.getpid()}-{id(self):x}-{self.method}-{route}')
+        if self.profile is not None:
+            self.profile.dump_stats(base + '.prof')
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return base
+
+
+def current() -> Optional[RequestTrace]:
+    return _CURRENT.get()
+
+
+def activate(trace: RequestTrace) -> Token:
+    return _CURRENT.set(trace)
+
+
+def deactivate(token: Token):
+    _CURRENT.reset(token)
+
+
+def _profiled(trace: RequestTrace, call: Callable, *args, **kwargs):
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # another profiler is already active on this thread
+        return call(*args, **kwargs)
+    try:
+        return call(*args, **kwargs)
+    finally:
+        profiler.disable()
+        trace.add_profile(profiler)
+
+
+def profile_endpoint(endpoint: Callable) -> Callable:
+    """Wrap an endpoint so traced requests run it under cProfile.
+
+    Sync endpoints are profiled on the threadpool thread that runs them.
+    For async endpoints only the code on the event loop is covered, which
+    can include other requests' work interleaved with it.
+    """
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            trace = _CURRENT.get()
+            if trace is None:
+                return await endpoint(*args, **kwargs)
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                return await endpoint(*args, **kwargs)
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profiler.disable()
+                trace.add_profile(profiler)
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        trace = _CURRENT.get()
+        if trace is None:
+            return endpoint(*args, **kwargs)
+        return _profiled(trace, endpoint, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,53 @@
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class UnitOfWork:
+    """Write buffer for a single request.
+
+    While a unit of work is active, workflow writes (state changes, new and
+    updated case rows, messages and document rows) are collected here instead
+    of hitting disk, and ``workflow.unit_of_work`` flushes them together once
+    the request's logic has finished.
+    """
+
+    def __init__(self):
+        self.states: Dict[str, Dict] = {}
+        self.new_cases: Dict[str, Dict[str, str]] = {}
+        self.case_updates: Dict[str, Dict[str, Optional[str]]] = {}
+        self.messages: List[Dict] = []
+        self.documents: List[Dict] = []
+        # (from, to) stage changes, counted once they are committed
+        self.transitions: List[Tuple[str, str]] = []
+
+    def is_empty(self) -> bool:
+        return not (self.states or self.new_cases or self.case_updates or self.messages or self.documents)
+
+    def case_ids(self) -> Set[str]:
+        """Every case this unit of work writes to."""
+        return (set(self.states) | set(self.new_cases) | set(self.case_updates)
+                | {msg['case_id'] for msg in self.messages} | {rec['case_id'] for rec in self.documents})
+
+    def discard_cases(self, case_ids: Set[str]):
+        """Drop every buffered write for ``case_ids``."""
+        for case_id in case_ids:
+            self.states.pop(case_id, None)
+            self.new_cases.pop(case_id, None)
+            self.case_updates.pop(case_id, None)
+        self.messages = [msg for msg in self.messages if msg['case_id'] not in case_ids]
+        self.documents = [rec for rec in self.documents if rec['case_id'] not in case_ids]
+
+
+_CURRENT: ContextVar[Optional[UnitOfWork]] = ContextVar('unit_of_work', default=None)
+
+
+def current() -> Optional[UnitOfWork]:
+    return _CURRENT.get()
+
+
+def activate(uow: UnitOfWork) -> Token:
+    return _CURRENT.set(uow)
+
+
+def deactivate(token: Token):
+    _CURRENT.reset(token)
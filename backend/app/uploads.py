@@ -0,0 +1,94 @@
+from typing import List, Optional, Tuple
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+# allowance for multipart boundaries and part headers when checking Content-Length against the file size limit
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def multipart_boundary(content_type: Optional[str]) -> bytes:
+    media_type, options = parse_options_header(content_type or '')
+    if media_type != b'multipart/form-data' or not options.get(b'boundary'):
+        raise ValueError("Expected a multipart/form-data body")
+    return options[b'boundary']
+
+
+class MultipartUpload:
+    """Incremental parser for the file part of a multipart/form-data body.
+
+    The body is fed chunk by chunk as it arrives; ``feed`` returns the bytes
+    of the ``field`` part completed by that chunk, so they can be hashed and
+    written without spooling the request first. ``filename`` and
+    ``content_type`` are set once that part's headers have been read. Other
+    parts are skipped, and so are later parts with the same name.
+    """
+
+    def __init__(self, content_type: Optional[str], field: str = 'file'):
+        self.field = field.encode('utf-8')
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.found = False
+        self.complete = False
+        self._headers: List[Tuple[bytes, bytes]] = []
+        self._header_name = b''
+        self._header_value = b''
+        self._in_field = False
+        self._data: List[bytes] = []
+        self._parser = MultipartParser(multipart_boundary(content_type), {
+            'on_part_begin': self._on_part_begin,
+            'on_part_data': self._on_part_data,
+            'on_part_end': self._on_part_end,
+            'on_header_field': self._on_header_field,
+            'on_header_value': self._on_header_value,
+            'on_header_end': self._on_header_end,
+            'on_headers_finished': self._on_headers_finished,
+        })
+
+    # -- parser callbacks ----------------------------------------------------
+
+    def _on_part_begin(self):
+        self._headers = []
+        self._in_field = False
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers.append((self._header_name.lower(), self._header_value))
+        self._header_name = b''
+        self._header_value = b''
+
+    def _on_headers_finished(self):
+        headers = dict(self._headers)
+        _, options = parse_options_header(headers.get(b'content-disposition', b''))
+        if self.found or options.get(b'name') != self.field:
+            return
+        self.found = self._in_field = True
+        self.filename = options.get(b'filename', b'').decode('utf-8', 'replace')
+        self.content_type = headers.get(b'content-type', b'').decode('latin-1') or None
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_field:
+            self._data.append(data[start:end])
+
+    def _on_part_end(self):
+        if self._in_field:
+            self._in_field = False
+            self.complete = True
+
+    # -- feeding -------------------------------------------------------------
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        self._parser.write(chunk)
+        data, self._data = self._data, []
+        return data
+
+    def close(self) -> List[bytes]:
+        self._parser.finalize()
+        if not self.complete:
+            raise ValueError(f"Missing '{self.field.decode()}' file part" if not self.found else "Truncated multipart body")
+        data, self._data = self._data, []
+        return data
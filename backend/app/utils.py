@@ -1,6 +1,14 @@
-import csv, os, time, random, string
+import csv, os, random, string, tempfile, threading
+from contextlib import contextmanager
 from typing import Dict, List, Iterable
 
+from .metrics import storage_op
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
 
@@ -10,26 +18,127 @@ def uid(prefix: str) -> str:
 def read_csv(path: str) -> List[Dict]:
     if not os.path.exists(path):
         return []
-    with open(path, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        return list(reader)
+    with storage_op('read', path) as op, open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+        op.rows = len(rows)
+        op.bytes = os.fstat(f.fileno()).st_size
+        return rows
+
+class _PathLock:
+    """Reentrant lock for one path: a thread RLock plus an flock on ``<path>.lock``.
+
+    Only the outermost acquisition in a thread takes the inter-process lock,
+    so helpers that lock a file can call each other freely.
+    """
+
+    def __init__(self, path: str):
+        self.lock_path = path + '.lock'
+        self._rlock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self):
+        self._rlock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                ensure_dir(os.path.dirname(self.lock_path))
+                self._fd = open(self.lock_path, 'a')
+                fcntl.flock(self._fd.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                if self._fd is not None:
+                    self._fd.close()
+                    self._fd = None
+                self._rlock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd.fileno(), fcntl.LOCK_UN)
+            self._fd.close()
+            self._fd = None
+        self._rlock.release()
+
+
+_PATH_LOCKS: Dict[str, _PathLock] = {}
+_PATH_LOCKS_GUARD = threading.Lock()
+
+@contextmanager
+def file_lock(path: str):
+    """Hold an exclusive lock on ``path`` across threads and worker processes."""
+    key = os.path.abspath(path)
+    with _PATH_LOCKS_GUARD:
+        lock = _PATH_LOCKS.get(key)
+        if lock is None:
+            lock = _PATH_LOCKS[key] = _PathLock(key)
+    lock.acquire()
+    try:
+        yield
+    finally:
+        lock.release()
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', **kwargs):
+    """Write to a temp file beside ``path`` and rename it into place once complete.
+
+    Readers see either the old or the new file, never a partial one; if the
+    block raises, ``path`` is left untouched.
+    """
+    directory = os.path.dirname(path) or '.'
+    ensure_dir(directory)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o644)
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
 
 def write_csv(path: str, rows: List[Dict], fieldnames: Iterable[str]):
-    ensure_dir(os.path.dirname(path))
-    with open(path, 'w', newline='', encoding='utf-8') as f:
+    with storage_op('write', path) as op, file_lock(path), atomic_write(path, 'w', newline='', encoding='utf-8') as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         for r in rows:
             writer.writerow(r)
+        op.rows = len(rows)
+        op.bytes = f.tell()
+
+def read_csv_header(path: str) -> List[str]:
+    if not os.path.exists(path):
+        return []
+    with open(path, newline='', encoding='utf-8') as f:
+        return next(csv.reader(f), [])
 
 def append_csv(path: str, row: Dict, fieldnames: Iterable[str]):
+    append_csv_rows(path, [row], fieldnames)
+
+def append_csv_rows(path: str, rows: List[Dict], fieldnames: Iterable[str]):
+    """Append rows in a single open; existing files keep their own column order."""
+    if not rows:
+        return
     ensure_dir(os.path.dirname(path))
-    write_header = not os.path.exists(path)
-    with open(path, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        if write_header:
-            writer.writeheader()
-        writer.writerow(row)
+    with storage_op('append', path) as op, file_lock(path):
+        header = read_csv_header(path)
+        write_header = not header
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            start = f.tell()
+            writer = csv.DictWriter(f, fieldnames=header or list(fieldnames), extrasaction='ignore')
+            if write_header:
+                writer.writeheader()
+            writer.writerows(rows)
+            op.rows = len(rows)
+            op.bytes = f.tell() - start
 
 def now_iso() -> str:
     import datetime as dt
@@ -0,0 +1,107 @@
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+from .utils import ensure_dir, file_lock
+
+_COUNTER = struct.Struct('<Q')
+_HEADER_SIZE = 16  # 8-byte epoch, then padding
+
+
+class VersionTable:
+    """Change counters for collections and cases, shared by every worker process.
+
+    Counters live in a small memory-mapped file: keys hash to one of ``slots``
+    64-bit slots, so reading a version is a memory read with no system call
+    and no parsing. Writers bump the slots of every key they changed, under the
+    file's lock, after the change is on disk. Two keys sharing a slot only
+    cause spurious changes, never missed ones. Slot 0 is a global counter
+    folded into every version, for bulk rewrites that touch everything.
+
+    The epoch is random per data directory and is rotated by ``reset``, so
+    versions handed out before a wipe or an offline migration never match
+    again.
+    """
+
+    def __init__(self, path: str, slots: int = 1 << 16):
+        self.path = path
+        self.slots = slots
+        self._map: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    def _mapped(self) -> mmap.mmap:
+        if self._map is None:
+            with self._lock, file_lock(self.path):
+                if self._map is None:
+                    size = _HEADER_SIZE + self.slots * _COUNTER.size
+                    ensure_dir(os.path.dirname(self.path))
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    try:
+                        if os.fstat(fd).st_size < size:
+                            os.ftruncate(fd, size)
+                        mapped = mmap.mmap(fd, size)
+                    finally:
+                        os.close(fd)
+                    if mapped[:8] == b'\0' * 8:
+                        mapped[:8] = os.urandom(8)
+                    self._map = mapped
+        return self._map
+
+    def _offset(self, key: str) -> int:
+        slot = 1 + zlib.crc32(key.encode('utf-8')) % (self.slots - 1)
+        return _HEADER_SIZE + slot * _COUNTER.size
+
+    def get(self, key: str) -> int:
+        return _COUNTER.unpack_from(self._mapped(), self._offset(key))[0]
+
+    def get_many(self, keys: Iterable[str]) -> List[int]:
+        mapped = self._mapped()
+        return [_COUNTER.unpack_from(mapped, self._offset(key))[0] for key in keys]
+
+    def generation(self) -> Tuple[bytes, int]:
+        """The epoch and global counter, which every version is relative to."""
+        mapped = self._mapped()
+        return mapped[:8], _COUNTER.unpack_from(mapped, _HEADER_SIZE)[0]
+
+    def bump(self, keys: Iterable[str]):
+        offsets = {self._offset(key) for key in keys}
+        self._increment(offsets)
+
+    def bump_all(self):
+        self._increment({_HEADER_SIZE})
+
+    def _increment(self, offsets):
+        if not offsets:
+            return
+        mapped = self._mapped()
+        with file_lock(self.path):
+            for offset in offsets:
+                _COUNTER.pack_into(mapped, offset, _COUNTER.unpack_from(mapped, offset)[0] + 1)
+
+    def reset(self):
+        """Rotate the epoch, invalidating every version handed out so far."""
+        mapped = self._mapped()
+        with file_lock(self.path):
+            mapped[:8] = os.urandom(8)
+
+    def etag(self, key: str) -> str:
+        """Weak ETag for ``key``, read without touching any data file."""
+        epoch, overall = self.generation()
+        return f'W/"{epoch.hex()}-{overall}-{self.get(key)}"'
+
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against ``etag``."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    wanted = etag[2:] if etag.startswith('W/') else etag
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith('W/') else tag) == wanted:
+            return True
+    return False
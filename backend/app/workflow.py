@@ -1,17 +1,35 @@
-import csv
-import json
 import logging
 import os
 import re
-from typing import Dict, List, Optional
-
+import shutil
+from contextlib import ExitStack, contextmanager, nullcontext
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from . import events, metrics
+from .blob_store import BlobStore
+from .case_log import CaseLog
+from .case_store import CaseStore
+from .code_catalog import CatalogLoader, CodeCatalog
+from .packages import PackageBuilder, render_artifact
 from .settings import settings
-from .utils import append_csv, ensure_dir, now_iso, read_csv, uid, write_csv
+from .state_store import StateStore
+from .tombstones import TombstoneSet
+from .unit_of_work import UnitOfWork, activate, current as current_unit_of_work, deactivate
+from .utils import append_csv_rows, file_lock, now_iso, read_csv, uid, write_csv
+from .versions import VersionTable
 
 CASES_CSV = os.path.join(settings.DATA_DIR, 'cases.csv')
 MSGS_CSV = os.path.join(settings.DATA_DIR, 'messages.csv')
 DOCS_CSV = os.path.join(settings.DATA_DIR, 'documents.csv')
+# legacy single-file state; split into WORKFLOW_STATE_DIR by migration 2
 WORKFLOW_STATE = os.path.join(settings.DATA_DIR, 'workflow_state.json')
+WORKFLOW_STATE_DIR = os.path.join(settings.DATA_DIR, 'workflow_states')
+LOCKS_DIR = os.path.join(settings.DATA_DIR, 'locks')
+UPLOADS_DIR = os.path.join(settings.DATA_DIR, 'uploads')
+BLOBS_DIR = os.path.join(settings.DATA_DIR, 'blobs')
+TOMBSTONES_FILE = os.path.join(settings.DATA_DIR, 'deleted_cases.txt')
+VERSIONS_FILE = os.path.join(settings.DATA_DIR, 'versions.bin')
 
 CASE_FIELD_ORDER = [
     'case_id',
@@ -30,15 +48,16 @@ CASE_FIELD_ORDER = [
 ]
 
 MESSAGE_FIELD_ORDER = ['msg_id', 'case_id', 'role', 'content', 'created_at']
-DOCUMENT_FIELD_ORDER = ['doc_id', 'case_id', 'name', 'type', 'path', 'public_url', 'uploaded_at']
+DOCUMENT_FIELD_ORDER = ['doc_id', 'case_id', 'name', 'type', 'path', 'public_url', 'uploaded_at', 'sha256', 'size']
+# case locks held at once while a bulk delete tombstones its cases
+DELETE_LOCK_BATCH = 256
 
-ADA_CODES_FILE = os.path.join(settings.DATA_DIR, 'ada_codes.csv')
+ADA_CODES_FILE = settings.ADA_CODES_FILE or os.path.join(settings.DATA_DIR, 'ada_codes.csv')
 ADA_CODE_PATTERN = re.compile(r'\bD\d{4}\b', re.IGNORECASE)
 
 logger = logging.getLogger(__name__)
 
-_ADA_CODES_CACHE: Dict[str, str] = {}
-_ADA_CODES_MTIME: float | None = None
+_ADA_CODES = CatalogLoader(ADA_CODES_FILE, settings.ADA_CODES_RELOAD_INTERVAL_SECONDS)
 
 SOAP_SAMPLE = """VINCENT W. H. WANG DDS INC\n572 E Green St, Ste 205, Pasadena, CA 91101\n\nPatient Name: MCCORMICK, DEBORAH A.\nDOB: 12/18/1951\nGender: Female\nPrimary Payor: Medicare CA - Southern California\nMBI/Primary #: 4VR1M50JQ34\nService Date (DOS): 10/06/2023\nMR/Chart ID / Patient Account #: M98593279\nReferring/Attending Provider: Vincent W. H. Wang, DDS (NPI 1366503385)\n\nSOAP NOTE (Operative Visit)\n\nS - Subjective\n- Chief Complaint: "My jaw hurts and my bite feels off. Hard to chew on the left."\n- HPI: 72-year-old female with chronic jaw pain and malocclusion, progressively worsening over ~12 months. Pain 6/10 with mastication; improved with soft diet and OTC ibuprofen. Intermittent left maxillary sinus pressure. Denies fever, trismus, dysphagia, or recent dental abscess.\n- ROS: Negative for chest pain, dyspnea, bleeding disorders. Positive for intermittent sinus pressure as above; otherwise non-contributory.\n- PMH (training assumption): Hypertension (controlled), hyperlipidemia; no history of bleeding disorder; no bisphosphonate use; no prior head & neck radiation. ASA class II.\n- Meds (training assumption): Lisinopril 10 mg daily; Atorvastatin 20 mg nightly; Vitamin D/calcium; Ibuprofen 200 mg as needed.\n- Allergies: No known drug allergies (NKDA).\n- Social: Non-smoker; occasional wine; lives independently.\n\nO - Objective\n- Vitals (pre-op): BP 128/76 mmHg, HR 74 bpm, Temp 98.1 F, SpO2 98% RA, BMI not assessed.\n- Exam findings:\n  * Maxillary ridge deficiency with tenderness along the right edentulous ridge.\n  * Mandibular alveolar irregularities with two lateral exostoses causing occlusal interference and mucosal irritation.\n  * Left posterior mandible with palpable submucosal foreign material; mucosa intact without purulence.\n  * Occlusion: malocclusion with reduced vertical dimension; no trismus.\n  * Imaging/Studies: Prior panoramic/CBCT consistent with ridge atrophy, mandibular exostoses, and left maxillary sinus changes; no acute osteomyelitis.\n\nAnesthesia & Peri-op Management (training assumption)\n- Technique: Local anesthesia with minimal sedation.\n- Local: 2% lidocaine with 1:100,000 epi (4 cartridges, 7.2 mL) via infiltrations + IAN block; 0.5% bupivacaine with 1:200,000 epi (1 cartridge, 1.8 mL) for post-op analgesia.\n- Sedation: Oral triazolam 0.25 mg pre-procedure + nitrous oxide 30% titrated; continuous pulse oximetry; BP every 5 minutes; suction/oxygen available; NPO 6 hours confirmed.\n- Antisepsis: 0.12% chlorhexidine rinse pre-op; sterile drape; PPE per protocol.\n\nO - Procedures Performed (CPT with analogous CDT mapping)\n- 21210: Bone graft, maxilla (right ridge) (CDT D7950).\n  * Decortication; placement of allogeneic cortico-cancellous particulate graft (~1.5 cc) with resorbable collagen membrane (15x20 mm). Primary closure with 4-0 chromic.\n- 21209: Chin augmentation with bone graft (CDT D7994; distinct site).\n  * Onlay augmentation using autogenous shavings (bone scraper) blended with allograft; secured to symphysis; layered closure with 4-0 Vicryl.\n- 21026 x2: Excision of mandibular exostoses (CDT D7472).\n  * Removal of two separate bony prominences causing prosthetic/occlusal interference.\n- 10120 x2: Removal of foreign body, subcutaneous/osseous (CDT D7296).\n  * Two retained fragments excised from left posterior mandible via separate incision; copious irrigation.\n- 31020: Surgical sinusotomy, left maxillary (CDT D7953 analog).\n  * Restored ostial patency and sinus floor support to aid graft integration; hemostasis achieved.\n- 40800: Excision of vestibule of mouth (anterior mandible) (CDT D7471).\n  * Limited vestibuloplasty/soft-tissue excision for prosthetic preparation; straightforward closure.\n\nOther Intra-op Details\n- Estimated Blood Loss: ~20 mL.\n- Fluids: PO as tolerated post-op.\n- Specimens: None submitted.\n- Complications: None.\n- Counts: Instruments/gauze/sutures correct at case end.\n\nA - Assessment\n- R68.84: Jaw pain.\n- M26.4: Malocclusion of teeth.\n- Post-op condition stable; pain controlled; no immediate complications.\n\nP - Plan\n- Medications:\n  * Amoxicillin 500 mg PO TID x7 days.\n  * Ibuprofen 600 mg PO every 6 hours as needed (max 2400 mg/day); may alternate with Acetaminophen 500 mg every 6 hours as needed (max 3000 mg/day).\n  * Chlorhexidine 0.12% rinse 15 mL BID for 7-10 days (avoid eating/drinking for 30 minutes after use).\n- Post-op Instructions: Ice 20 minutes on/off first 24 hours; head elevation; soft diet for 48-72 hours; avoid vigorous rinsing or straws for 24 hours; no smoking. For sinusotomy: no nose blowing for 10 days, sneeze with mouth open, use OTC saline spray as needed. Call for fever >101.5 F, uncontrolled pain/bleeding, or expanding swelling. Written instructions provided.\n- Follow-Up: 10-14 days for suture check and healing evaluation; sooner as needed.\n- Return Precautions: As above; 24-hour on-call number provided.\n- Billing/Coding Summary: 21210; 21209; 21026 x2; 10120 x2; 31020; 40800 linked to R68.84, M26.4.\n\nProvider: Vincent W. H. Wang, DDS\nSignature: _________________________\nDate: _________________________"""
 
@@ -147,83 +166,184 @@ def canonical_case_row(raw: Dict[str, Optional[str]]) -> Optional[Dict[str, str]
     return data
 
 
+_CASE_STORE = CaseStore(CASES_CSV, CASE_FIELD_ORDER, canonical_case_row)
+_STATE_STORE = StateStore(WORKFLOW_STATE_DIR)
+_MESSAGE_LOG = CaseLog(MSGS_CSV, MESSAGE_FIELD_ORDER)
+_BLOB_STORE = BlobStore(BLOBS_DIR)
+# read-side index over documents.csv; rows are still written with append_csv_rows
+_DOCUMENT_LOG = CaseLog(DOCS_CSV, DOCUMENT_FIELD_ORDER)
+_TOMBSTONES = TombstoneSet(TOMBSTONES_FILE)
+_VERSIONS = VersionTable(VERSIONS_FILE)
+_PACKAGES = PackageBuilder(BLOBS_DIR, settings.PACKAGE_WORKERS)
+
+
+def _live(rows: Iterable[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Drop rows of cases that were deleted but not compacted yet."""
+    if not len(_TOMBSTONES):
+        return list(rows)
+    return [row for row in rows if row['case_id'] not in _TOMBSTONES]
+
+
 def load_cases() -> List[Dict[str, str]]:
-    if not os.path.exists(CASES_CSV):
-        return []
-    with open(CASES_CSV, newline='', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        header = next(reader, [])
-        rows: List[Dict[str, str]] = []
-        for raw_row in reader:
-            if not any(raw_row):
-                continue
-            mapping = {header[i]: raw_row[i] for i in range(min(len(header), len(raw_row)))}
-            normalized = canonical_case_row(mapping)
-            if normalized:
-                rows.append(normalized)
-        return rows
+    return _live(_CASE_STORE.all())
+
+
+def find_cases(stage: Optional[str] = None, payer: Optional[str] = None) -> List[Dict[str, str]]:
+    """Live cases in creation order, restricted to ``stage`` and ``payer`` through CaseStore's indexes when given."""
+    return _live(_CASE_STORE.find(stage, payer))
+
+
+def page_cases(limit: int, after: Optional[str] = None, after_pos: Optional[int] = None,
+               stage: Optional[str] = None, payer: Optional[str] = None) -> Tuple[List[Dict[str, str]], Optional[Tuple[str, int]]]:
+    """Newest-first page of cases resuming after case ``after``; see CaseStore.page.
+
+    Deleted cases are skipped, reading further pages to fill ``limit``.
+    """
+    rows: List[Dict[str, str]] = []
+    last: Optional[Tuple[str, int]] = None
+    while True:
+        page, last = _CASE_STORE.page(limit - len(rows), after, after_pos, stage, payer)
+        rows.extend(_live(page))
+        if last is None or len(rows) >= limit:
+            return rows, last
+        after, after_pos = last
+
+
+def iter_cases(batch_size: int = 500) -> Iterator[Dict[str, str]]:
+    """Yield every case newest first, holding only one page of rows at a time."""
+    after: Optional[Tuple[str, int]] = None
+    while True:
+        rows, after = page_cases(batch_size, *(after or (None, None)))
+        yield from rows
+        if after is None:
+            return
+
+
+def get_case_row(case_id: str) -> Optional[Dict[str, str]]:
+    uow = current_unit_of_work()
+    if uow is not None and case_id in uow.new_cases:
+        row = dict(uow.new_cases[case_id])
+    else:
+        row = _CASE_STORE.get(case_id) if case_id not in _TOMBSTONES else None
+    if row is not None and uow is not None and case_id in uow.case_updates:
+        row.update({k: '' if v is None else str(v) for k, v in uow.case_updates[case_id].items()})
+    return row
+
+
+def case_exists(case_id: str) -> bool:
+    uow = current_unit_of_work()
+    if uow is not None and case_id in uow.new_cases:
+        return True
+    return case_id not in _TOMBSTONES and _CASE_STORE.exists(case_id)
 
 
 def write_cases(rows: List[Dict[str, str]]):
-    if not rows:
-        # still ensure the file is cleared with just a header
-        ensure_dir(os.path.dirname(CASES_CSV))
-        with open(CASES_CSV, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=CASE_FIELD_ORDER)
-            writer.writeheader()
-        return
+    _CASE_STORE.replace_all(rows)
+    _VERSIONS.bump_all()
 
-    prepared: List[Dict[str, str]] = []
-    for row in rows:
-        base = {field: '' for field in CASE_FIELD_ORDER}
-        for key, value in row.items():
-            if key in base:
-                base[key] = '' if value is None else str(value)
-        prepared.append(base)
-    write_csv(CASES_CSV, prepared, CASE_FIELD_ORDER)
+
+def cases_etag() -> str:
+    return _VERSIONS.etag('cases')
+
+
+def case_etag(case_id: str) -> str:
+    return _VERSIONS.etag(f'case:{case_id}')
+
+
+def messages_etag(case_id: str) -> str:
+    return _VERSIONS.etag(f'messages:{case_id}')
+
+
+def documents_etag(case_id: str) -> str:
+    return _VERSIONS.etag(f'documents:{case_id}')
+
+
+def case_versions(case_ids: Iterable[str]) -> List[Tuple]:
+    """Current version of each case, for caching anything derived from its row or state."""
+    generation = _VERSIONS.generation()
+    return [(generation, version) for version in _VERSIONS.get_many(f'case:{case_id}' for case_id in case_ids)]
+
+
+def reset_versions():
+    _VERSIONS.reset()
+
+
+def _bump_versions(cases: Iterable[str] = (), messages: Iterable[str] = (), documents: Iterable[str] = ()):
+    """Advance the versions behind the ETags of everything a write changed.
+
+    Called once the write is on disk; a case change also changes the case
+    list, since list rows embed the case.
+    """
+    keys = [f'case:{case_id}' for case_id in cases]
+    if keys:
+        keys.append('cases')
+    keys.extend(f'messages:{case_id}' for case_id in messages)
+    keys.extend(f'documents:{case_id}' for case_id in documents)
+    _VERSIONS.bump(keys)
 
 
 def _load_states() -> Dict[str, Dict]:
-    if not os.path.exists(WORKFLOW_STATE):
-        return {}
-    with open(WORKFLOW_STATE, 'r', encoding='utf-8') as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return {}
+    return _STATE_STORE.load_all()
 
 
 def _save_states(states: Dict[str, Dict]):
-    ensure_dir(os.path.dirname(WORKFLOW_STATE))
-    with open(WORKFLOW_STATE, 'w', encoding='utf-8') as f:
-        json.dump(states, f, indent=2)
+    """Persist the given case states; cases not in ``states`` are left untouched."""
+    for case_id, state in states.items():
+        _STATE_STORE.put(case_id, state)
+
+
+def _stored_state(case_id: str) -> Optional[Dict]:
+    uow = current_unit_of_work()
+    if uow is not None and case_id in uow.states:
+        return dict(uow.states[case_id])
+    return _STATE_STORE.get(case_id)
 
 
 def get_state(case_id: str) -> Dict:
-    return _load_states().get(case_id, {'stage': 'awaiting_case_start', 'context': {}})
+    return _stored_state(case_id) or {'stage': 'awaiting_case_start', 'context': {}}
+
+
+def get_states(case_ids: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+    """Resolve many workflow states in one pass over the state store."""
+    if case_ids is None:
+        return _load_states()
+    case_ids = list(case_ids)
+    states = _STATE_STORE.get_many(case_ids)
+    uow = current_unit_of_work()
+    if uow is not None:
+        states.update({case_id: uow.states[case_id] for case_id in case_ids if case_id in uow.states})
+    return {case_id: states.get(case_id, {'stage': 'awaiting_case_start', 'context': {}}) for case_id in case_ids}
 
 
 def set_state(case_id: str, stage: str, context: Optional[Dict] = None):
-    states = _load_states()
-    states[case_id] = {
+    previous = _stored_state(case_id) or {}
+    state = {
         'stage': stage,
-        'context': context or states.get(case_id, {}).get('context', {}) or {},
+        'context': context or previous.get('context', {}) or {},
     }
-    _save_states(states)
+    transition = (previous.get('stage') or '', stage)
+    uow = current_unit_of_work()
+    if uow is not None:
+        uow.states[case_id] = state
+        if transition[0] != stage:
+            uow.transitions.append(transition)
+        return
+    _save_states({case_id: state})
+    # stage-less case rows take their stage from the state
+    _bump_versions(cases=[case_id])
+    if transition[0] != stage:
+        metrics.stage_transition(*transition)
 
 
 def update_case(case_id: str, updates: Dict[str, Optional[str]]):
-    rows = load_cases()
-    updated = False
-    for row in rows:
-        if row.get('case_id') == case_id:
-            for key, value in updates.items():
-                row[key] = '' if value is None else str(value)
-            row['updated_at'] = now_iso()
-            updated = True
-    if not updated:
+    uow = current_unit_of_work()
+    if uow is not None:
+        uow.case_updates.setdefault(case_id, {}).update(updates)
         return
-    write_cases(rows)
+    row = _CASE_STORE.update(case_id, {**updates, 'updated_at': now_iso()})
+    if row is not None:
+        _bump_versions(cases=[case_id])
+        events.publish('case', case_id, row)
 
 
 def record_message(case_id: str, role: str, content: str) -> Dict:
@@ -234,10 +354,135 @@ def record_message(case_id: str, role: str, content: str) -> Dict:
         'content': content,
         'created_at': now_iso(),
     }
-    append_csv(MSGS_CSV, msg, msg.keys())
+    uow = current_unit_of_work()
+    if uow is not None:
+        uow.messages.append(msg)
+    else:
+        _MESSAGE_LOG.append([msg])
+        _bump_versions(messages=[case_id])
+        events.publish('message', case_id, msg)
     return msg
 
 
+def list_messages(case_id: str) -> List[Dict[str, str]]:
+    """Chat history for one case in the order it was recorded."""
+    if case_id in _TOMBSTONES:
+        return []
+    return _MESSAGE_LOG.for_case(case_id)
+
+
+def page_messages(case_id: str, limit: int, after: Optional[int] = None) -> Tuple[List[Dict[str, str]], Optional[int]]:
+    if case_id in _TOMBSTONES:
+        return [], None
+    return _MESSAGE_LOG.page(case_id, limit, after)
+
+
+def list_documents(case_id: str) -> List[Dict[str, str]]:
+    """Document rows for one case in upload order, read through the documents.csv index."""
+    if case_id in _TOMBSTONES:
+        return []
+    return _DOCUMENT_LOG.for_case(case_id)
+
+
+def record_document(rec: Dict) -> Dict:
+    record_documents([rec])
+    return rec
+
+
+def record_documents(recs: List[Dict]):
+    uow = current_unit_of_work()
+    if uow is not None:
+        uow.documents.extend(recs)
+    elif recs:
+        append_csv_rows(DOCS_CSV, recs, DOCUMENT_FIELD_ORDER)
+        _bump_versions(documents={rec['case_id'] for rec in recs})
+
+
+def discard_upload(path: str, sha256: str):
+    """Remove an upload whose document row was never recorded, releasing its blob if no row uses it."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    with file_lock(DOCS_CSV):
+        if os.path.exists(DOCS_CSV) and any(r.get('sha256') == sha256 for r in read_csv(DOCS_CSV)):
+            return
+        _BLOB_STORE.release(sha256)
+
+
+def _case_lock_path(case_id: str) -> str:
+    return os.path.join(LOCKS_DIR, quote(case_id, safe=''))
+
+
+@contextmanager
+def unit_of_work(case_id: Optional[str] = None):
+    """Buffer every workflow write made inside the block and commit them together.
+
+    Each touched state file is written once, case rows are updated with a
+    single cases.csv write, and messages and documents go out as one append
+    per file. Nested blocks join the outer unit of work; if the block raises,
+    the buffered writes are discarded. Passing ``case_id`` holds that case's
+    inter-process lock from the first read to the commit, so concurrent
+    requests for one case (from any worker) are applied one after another.
+    """
+    active = current_unit_of_work()
+    if active is not None:
+        yield active
+        return
+    with file_lock(_case_lock_path(case_id)) if case_id else nullcontext():
+        uow = UnitOfWork()
+        token = activate(uow)
+        try:
+            yield uow
+        finally:
+            deactivate(token)
+        _commit(uow)
+
+
+def _commit(uow: UnitOfWork):
+    # a case deleted while the unit of work was open must not be written back
+    deleted = {case_id for case_id in uow.case_ids() - set(uow.new_cases) if not case_exists(case_id)}
+    if deleted:
+        logger.info("Dropping writes for deleted cases: %s", ', '.join(sorted(deleted)))
+        dropped_documents = [rec for rec in uow.documents if rec['case_id'] in deleted]
+        uow.discard_cases(deleted)
+        # their files were linked before the commit, and no row would ever lead compaction to them
+        for rec in dropped_documents:
+            discard_upload(rec['path'], rec['sha256'])
+    if uow.is_empty():
+        return
+    _MESSAGE_LOG.append(uow.messages)
+    append_csv_rows(DOCS_CSV, uow.documents, DOCUMENT_FIELD_ORDER)
+    _save_states(uow.states)
+    now = now_iso()
+    changed: Dict[str, Dict] = {}
+    if uow.new_cases:
+        for case_id, row in uow.new_cases.items():
+            if case_id in uow.case_updates:
+                row.update(uow.case_updates.pop(case_id))
+                row['updated_at'] = now
+        _CASE_STORE.add_many(uow.new_cases.values())
+        changed.update((case_id, _CASE_STORE.get(case_id)) for case_id in uow.new_cases)
+    if uow.case_updates:
+        changed.update(_CASE_STORE.update_many({
+            case_id: {**updates, 'updated_at': now}
+            for case_id, updates in uow.case_updates.items()
+        }))
+    _bump_versions(
+        cases=set(changed) | set(uow.states),
+        messages={msg['case_id'] for msg in uow.messages},
+        documents={rec['case_id'] for rec in uow.documents},
+    )
+    for transition in uow.transitions:
+        metrics.stage_transition(*transition)
+    # subscribers hear about changes only once they are on disk
+    for msg in uow.messages:
+        events.publish('message', msg['case_id'], msg)
+    for case_id, row in changed.items():
+        if row is not None:
+            events.publish('case', case_id, row)
+
+
 def create_case_record(case_id: str, title: str, patient_name: Optional[str], payer: Optional[str], now: str) -> Dict[str, str]:
     row = {field: '' for field in CASE_FIELD_ORDER}
     row['case_id'] = case_id
@@ -257,68 +502,108 @@ def create_case_record(case_id: str, title: str, patient_name: Optional[str], pa
 
 
 def add_case(row: Dict[str, str]):
-    rows = load_cases()
-    rows.append(row)
-    write_cases(rows)
+    uow = current_unit_of_work()
+    if uow is not None:
+        uow.new_cases[row['case_id']] = dict(row)
+        return
+    _CASE_STORE.add(row)
+    _bump_versions(cases=[row['case_id']])
+
+
+def import_cases(payloads: List[Dict[str, Optional[str]]]) -> List[str]:
+    """Create many cases, with their initial state and greeting, in one batched commit.
+
+    Rows are appended to cases.csv and messages.csv once per batch instead of
+    once per case, so importing N cases costs O(N) rather than O(N^2).
+    """
+    now = now_iso()
+    case_ids: List[str] = []
+    with unit_of_work():
+        for payload in payloads:
+            case_id = uid('case')
+            add_case(create_case_record(case_id, payload['title'], payload.get('patient_name'), payload.get('payer'), now))
+            initialize_case(case_id, payload['title'])
+            case_ids.append(case_id)
+    return case_ids
 
 
 def normalize_case_file():
-    rows = load_cases()
+    rows = _CASE_STORE.all()
     if rows:
         write_cases(rows)
 
 
 def delete_case_data(case_id: str):
-    # Remove case row
-    cases = [row for row in load_cases() if row['case_id'] != case_id]
-    write_cases(cases)
-
-    # Remove workflow state
-    state = _load_states()
-    if case_id in state:
-        state.pop(case_id, None)
-        _save_states(state)
-
-    # Remove associated messages
-    if os.path.exists(MSGS_CSV):
-        rows = read_csv(MSGS_CSV)
-        remaining = [r for r in rows if r.get('case_id') != case_id]
-        fieldnames = list(rows[0].keys()) if rows else MESSAGE_FIELD_ORDER
-        write_csv(MSGS_CSV, remaining, fieldnames)
-
-    # Remove associated documents + files
-    if os.path.exists(DOCS_CSV):
-        rows = read_csv(DOCS_CSV)
-        keep_rows = []
-        for r in rows:
-            if r.get('case_id') == case_id:
-                path = r.get('path')
-                if path and os.path.exists(path):
-                    try:
-                        os.remove(path)
-                    except OSError:
-                        pass
-            else:
-                keep_rows.append(r)
-        fieldnames = list(rows[0].keys()) if rows else DOCUMENT_FIELD_ORDER
-        write_csv(DOCS_CSV, keep_rows, fieldnames)
-
-    # Remove uploads directory
-    uploads_dir = os.path.join(settings.DATA_DIR, 'uploads', case_id)
-    if os.path.isdir(uploads_dir):
-        try:
-            for root, _, files in os.walk(uploads_dir, topdown=False):
-                for name in files:
-                    try:
-                        os.remove(os.path.join(root, name))
-                    except OSError:
-                        pass
-                try:
-                    os.rmdir(root)
-                except OSError:
-                    pass
-        except OSError:
-            pass
+    delete_cases([case_id])
+
+
+def delete_cases(case_ids: Iterable[str]) -> List[str]:
+    """Tombstone existing cases; returns the ids that were deleted.
+
+    Deleted cases disappear from every read straight away. Their rows, state,
+    uploads and unshared blobs are removed later by ``compact_deleted_cases``.
+    Each case's lock is held while it is tombstoned, so a unit of work already
+    running for it commits first; later ones find it deleted and write nothing.
+    """
+    # locked in sorted batches: bounded open lock files, and two deletes sharing cases cannot wait on each other
+    requested = list(dict.fromkeys(case_ids))
+    ordered = sorted(requested)
+    tombstoned = set()
+    for start in range(0, len(ordered), DELETE_LOCK_BATCH):
+        batch = ordered[start:start + DELETE_LOCK_BATCH]
+        with ExitStack() as stack:
+            for case_id in batch:
+                stack.enter_context(file_lock(_case_lock_path(case_id)))
+            live = [case_id for case_id in batch if case_exists(case_id)]
+            _TOMBSTONES.add_many(live)
+        tombstoned.update(live)
+    deleted = [case_id for case_id in requested if case_id in tombstoned]
+    _bump_versions(cases=deleted, messages=deleted, documents=deleted)
+    for case_id in deleted:
+        events.publish('case_deleted', case_id, {'case_id': case_id})
+    return deleted
+
+
+def pending_deletions() -> int:
+    return len(_TOMBSTONES)
+
+
+def compact_deleted_cases(batch_size: int = 500) -> int:
+    """Physically remove up to ``batch_size`` tombstoned cases; returns how many were compacted.
+
+    Each data file is rewritten once per batch rather than once per case.
+    Holding the tombstone file's lock keeps worker processes from compacting
+    the same batch twice.
+    """
+    with file_lock(TOMBSTONES_FILE):
+        dead = _TOMBSTONES.ids()[:batch_size]
+        if not dead:
+            return 0
+        dead_set = set(dead)
+
+        _CASE_STORE.remove_many(dead)
+        for case_id in dead:
+            _STATE_STORE.delete(case_id)
+        _MESSAGE_LOG.remove_cases(dead)
+        # uploads go first so the links they hold no longer keep their blobs
+        for case_id in dead:
+            shutil.rmtree(os.path.join(UPLOADS_DIR, case_id), ignore_errors=True)
+
+        # shared blobs are only released once no remaining document row references them
+        with file_lock(DOCS_CSV):
+            if os.path.exists(DOCS_CSV):
+                rows = read_csv(DOCS_CSV)
+                keep_rows = [r for r in rows if r.get('case_id') not in dead_set]
+                if len(keep_rows) != len(rows):
+                    released = {r['sha256'] for r in rows if r.get('case_id') in dead_set and r.get('sha256')}
+                    fieldnames = list(rows[0].keys()) if rows else DOCUMENT_FIELD_ORDER
+                    write_csv(DOCS_CSV, keep_rows, fieldnames)
+                    for sha256 in released - {r.get('sha256') for r in keep_rows}:
+                        _BLOB_STORE.release(sha256)
+
+        _TOMBSTONES.discard_many(dead)
+    logger.info("Compacted %d deleted cases", len(dead))
+    return len(dead)
 
 def apply_stage(case_id: str, stage: str, extra: Optional[Dict[str, Optional[str]]] = None):
     payload = dict(STAGE_DEFAULTS.get(stage, {}))
@@ -330,8 +615,7 @@ def apply_stage(case_id: str, stage: str, extra: Optional[Dict[str, Optional[str
 
 
 def initialize_case(case_id: str, title: str):
-    states = _load_states()
-    if case_id in states:
+    if _STATE_STORE.get(case_id) is not None:
         return
 
     context = {
@@ -439,123 +723,130 @@ def _choice_from_text(text: str) -> Optional[str]:
     return None
 
 
-def _generate_case_file(case_id: str, filename: str, content: str, doc_type: str = 'generated') -> Dict:
-    case_dir = os.path.join(settings.DATA_DIR, 'uploads', case_id)
-    ensure_dir(case_dir)
-    path = os.path.join(case_dir, filename)
-    with open(path, 'w', encoding='utf-8') as f:
-        f.write(content)
-    rec = {
+def _link_generated(case_id: str, artifact: Dict, sha256: str, size: int) -> Dict:
+    """Expose a rendered blob in the case's uploads and build its document row.
+
+    If compaction released the blob since it was rendered, the artifact is
+    rendered again here and linked while the blob is still locked.
+    """
+    filename = artifact['filename']
+    path = os.path.join(UPLOADS_DIR, case_id, filename)
+    try:
+        _BLOB_STORE.link(sha256, path)
+    except FileNotFoundError:
+        sha256, size = render_artifact(BLOBS_DIR, artifact, link_to=path)
+    return {
         'doc_id': uid('doc'),
         'case_id': case_id,
         'name': filename,
-        'type': doc_type,
+        'type': artifact['doc_type'],
         'path': path,
         'uploaded_at': now_iso(),
         'public_url': f"/uploads/{case_id}/{filename}",
+        'sha256': sha256,
+        'size': str(size),
     }
-    append_csv(DOCS_CSV, rec, rec.keys())
-    return rec
 
 
-def _generate_pdf(case_id: str, filename: str, text: str) -> Dict:
-    case_dir = os.path.join(settings.DATA_DIR, 'uploads', case_id)
-    ensure_dir(case_dir)
-    path = os.path.join(case_dir, filename)
-
-    lines = text.splitlines()
-    text_commands = ["BT", "/F1 11 Tf", "16 TL", "72 760 Td"]
-    for line in lines:
-        safe = line.replace('\\', r'\\').replace('(', r'\(').replace(')', r'\)')
-        text_commands.append(f"({safe}) Tj")
-        text_commands.append("T*")
-    text_commands.append("ET")
-
-    signature_y = 140
-    signature_commands = [
-        "BT",
-        "/F1 11 Tf",
-        f"72 {signature_y + 40} Td",
-        "(Provider: Vincent W. H. Wang, DDS) Tj",
-        "T*",
-        "(Signature: _________________________) Tj",
-        "T*",
-        "(Date: _________________________) Tj",
-        "ET",
-        f"72 {signature_y} m",
-        "360 {signature_y} l",
-        "S",
-    ]
-
-    content_stream = "\n".join(text_commands + signature_commands)
-    pdf = "\n".join([
-        '%PDF-1.4',
-        '1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj',
-        '2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj',
-        '3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >> endobj',
-        f'4 0 obj << /Length {len(content_stream)} >> stream',
-        content_stream,
-        'endstream endobj',
-        '5 0 obj << /Type /Font /Subtype /Type1 /Name /F1 /BaseFont /Helvetica >> endobj',
-        'xref',
-        '0 6',
-        '0000000000 65535 f ',
-        '0000000010 00000 n ',
-        '0000000060 00000 n ',
-        '0000000118 00000 n ',
-        '0000000276 00000 n ',
-        '0000000426 00000 n ',
-        'trailer << /Size 6 /Root 1 0 R >>',
-        'startxref',
-        '498',
-        '%%EOF',
-    ])
-    with open(path, 'wb') as f:
-        f.write(pdf.encode('latin-1'))
-    rec = {
-        'doc_id': uid('doc'),
-        'case_id': case_id,
-        'name': filename,
-        'type': 'generated-pdf',
-        'path': path,
-        'uploaded_at': now_iso(),
-        'public_url': f"/uploads/{case_id}/{filename}",
+SIGNATURE_LINES = [
+    'Provider: Vincent W. H. Wang, DDS',
+    'Signature: _________________________',
+    'Date: _________________________',
+]
+SIGNATURE_RULE_Y = 140
+
+
+def _text_artifact(filename: str, content: str, doc_type: str) -> Dict:
+    return {'filename': filename, 'format': 'text', 'content': content, 'doc_type': doc_type}
+
+
+def _pdf_artifact(filename: str, text: str) -> Dict:
+    return {
+        'filename': filename,
+        'format': 'pdf',
+        'content': text,
+        'doc_type': 'generated-pdf',
+        'closing_lines': SIGNATURE_LINES,
+        'rule_y': SIGNATURE_RULE_Y,
     }
-    append_csv(DOCS_CSV, rec, rec.keys())
-    return rec
 
 
-def _get_ada_codes() -> Dict[str, str]:
-    global _ADA_CODES_CACHE, _ADA_CODES_MTIME
-    try:
-        current_mtime = os.path.getmtime(ADA_CODES_FILE)
-    except FileNotFoundError:
-        if _ADA_CODES_CACHE:
-            logger.warning("ADA codes file missing at %s", ADA_CODES_FILE)
-        _ADA_CODES_CACHE = {}
-        _ADA_CODES_MTIME = None
-        return {}
+def _soap_note_artifacts() -> Dict[str, Dict]:
+    return {
+        'soap_note': _text_artifact('Deborah SOAP Note for Dr Review.txt', SOAP_SAMPLE, 'generated-soap'),
+        'soap_note_pdf': _pdf_artifact('Deborah SOAP Note for Dr Review.pdf', SOAP_SAMPLE),
+    }
 
-    if _ADA_CODES_CACHE and _ADA_CODES_MTIME == current_mtime:
-        return _ADA_CODES_CACHE
 
-    codes: Dict[str, str] = {}
-    try:
-        with open(ADA_CODES_FILE, newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                code = (row.get('code') or row.get('Code') or '').strip().upper()
-                description = (row.get('description') or row.get('Description') or '').strip()
-                if not code or not description:
-                    continue
-                codes[code] = description
-    except Exception as exc:
-        logger.error("Failed to load ADA codes: %%s", exc)
-        codes = {}
-
-    _ADA_CODES_CACHE = codes
-    _ADA_CODES_MTIME = current_mtime
-    return codes
+def _final_package_artifacts() -> Dict[str, Dict]:
+    return {
+        'final_package': _pdf_artifact('Deborah_McCormick_1500.pdf', 'CMS 1500 package ready for submission'),
+        'final_summary': _text_artifact(
+            'Deborah SOAP Note for Dr Review - Final Package.txt',
+            "Final package includes: Signed SOAP note, Operative note, CMS 1500/837I summary.",
+            'generated-summary',
+        ),
+    }
+
+
+def _generate_artifacts(requested: Dict[str, Dict[str, Dict]]) -> Dict[str, Dict[str, Dict]]:
+    """Render artifacts for one or many cases in the package pool and record them together.
+
+    ``requested`` maps case_id -> {key: artifact}; the result maps case_id ->
+    {key: document row}. All document rows go out in a single documents.csv
+    append (or join the active unit of work).
+    """
+    flat = [(case_id, key, artifact) for case_id, artifacts in requested.items() for key, artifact in artifacts.items()]
+    rendered = _PACKAGES.render([artifact for _, _, artifact in flat])
+    docs: Dict[str, Dict[str, Dict]] = {}
+    for (case_id, key, artifact), (sha256, size) in zip(flat, rendered):
+        docs.setdefault(case_id, {})[key] = _link_generated(case_id, artifact, sha256, size)
+    record_documents([rec for case_docs in docs.values() for rec in case_docs.values()])
+    return docs
+
+
+def build_final_packages(case_ids: Iterable[str]) -> Dict[str, List[Dict]]:
+    """Generate the final reimbursement package for many cases at once.
+
+    Rendering fans out over the package pool, the document rows are appended
+    in one batch, and each case's state then records its new package ids.
+    """
+    case_ids = [case_id for case_id in dict.fromkeys(case_ids) if case_exists(case_id)]
+    docs = _generate_artifacts({case_id: _final_package_artifacts() for case_id in case_ids})
+    for case_id, case_docs in docs.items():
+        with unit_of_work(case_id):
+            state = get_state(case_id)
+            ctx = state.get('context') or {}
+            documents = ctx.setdefault('documents', {})
+            for key, rec in case_docs.items():
+                documents[key] = rec['doc_id']
+            set_state(case_id, state.get('stage', 'awaiting_case_start'), ctx)
+    return {case_id: list(case_docs.values()) for case_id, case_docs in docs.items()}
+
+
+def shutdown_package_builder():
+    _PACKAGES.shutdown()
+
+
+def _get_ada_codes() -> CodeCatalog:
+    """The current code catalog; loaded at startup and kept fresh by the catalog watcher."""
+    return _ADA_CODES.get()
+
+
+def start_ada_code_watcher():
+    _ADA_CODES.start()
+
+
+def stop_ada_code_watcher():
+    _ADA_CODES.stop()
+
+
+def ada_code_catalog_metrics() -> Dict:
+    return _ADA_CODES.metrics()
+
+
+def search_ada_codes(query: str, limit: int = 20) -> List[Dict[str, Optional[str]]]:
+    return _get_ada_codes().search(query, limit)
 
 
 def _ada_code_responses(case_id: str, content: str) -> List[Dict]:
@@ -569,7 +860,7 @@ def _ada_code_responses(case_id: str, content: str) -> List[Dict]:
     responses: List[Dict] = []
 
     if known:
-        lines = "\n".join(f"- {code}: {codes_lookup[code]}" for code in known)
+        lines = "\n".join(f"- {code}: {codes_lookup.get(code)}" for code in known)
         message = "Here is what I have on the ADA codes you mentioned:\n" + lines
         responses.append(record_message(case_id, 'assistant', message))
 
@@ -676,17 +967,8 @@ def handle_user_message(case_id: str, content: str) -> List[Dict]:
 
     elif stage == 'awaiting_final_confirmation':
         if _kw_match(content, 'yes', 'proceed', 'ok', 'okay', 'confirm'):
-            soap = _generate_case_file(
-                case_id,
-                'Deborah SOAP Note for Dr Review.txt',
-                SOAP_SAMPLE,
-                doc_type='generated-soap',
-            )
-            soap_pdf = _generate_pdf(
-                case_id,
-                'Deborah SOAP Note for Dr Review.pdf',
-                SOAP_SAMPLE,
-            )
+            generated = _generate_artifacts({case_id: _soap_note_artifacts()})[case_id]
+            soap, soap_pdf = generated['soap_note'], generated['soap_note_pdf']
             ctx['documents']['soap_note'] = soap['doc_id']
             ctx['documents']['soap_note_pdf'] = soap_pdf['doc_id']
             set_state(case_id, 'awaiting_signed_soap_note', ctx)
@@ -749,6 +1031,17 @@ def _complete_rcm_review(case_id: str, ctx: Dict) -> List[Dict]:
     return responses
 
 
+def process_document_job(payload: Dict) -> Dict:
+    """Job handler: run the workflow transition for an uploaded document."""
+    case_id = payload['case_id']
+    with unit_of_work(case_id):
+        if not case_exists(case_id):
+            return {'stage': None, 'messages': []}  # deleted while the job was queued
+        responses = handle_document_upload(case_id, payload['doc'])
+        stage = get_state(case_id).get('stage')
+    return {'stage': stage, 'messages': [msg['msg_id'] for msg in responses]}
+
+
 def handle_document_upload(case_id: str, doc: Dict) -> List[Dict]:
     state = get_state(case_id)
     stage = state.get('stage', 'awaiting_case_start')
@@ -798,15 +1091,9 @@ def handle_document_upload(case_id: str, doc: Dict) -> List[Dict]:
 
     elif stage == 'awaiting_signed_soap_note':
         ctx.setdefault('documents', {})['signed_soap'] = doc['doc_id']
-        package_pdf = _generate_pdf(case_id, 'Deborah_McCormick_1500.pdf', 'CMS 1500 package ready for submission')
-        package_summary = _generate_case_file(
-            case_id,
-            'Deborah SOAP Note for Dr Review - Final Package.txt',
-            "Final package includes: Signed SOAP note, Operative note, CMS 1500/837I summary.",
-            doc_type='generated-summary',
-        )
-        ctx.setdefault('documents', {})['final_package'] = package_pdf['doc_id']
-        ctx.setdefault('documents', {})['final_summary'] = package_summary['doc_id']
+        package = _generate_artifacts({case_id: _final_package_artifacts()})[case_id]
+        for key, rec in package.items():
+            ctx.setdefault('documents', {})[key] = rec['doc_id']
         set_state(case_id, 'completed', ctx)
         apply_stage(case_id, 'completed')
         responses.append(record_message(case_id, 'assistant',
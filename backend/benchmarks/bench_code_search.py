@@ -0,0 +1,68 @@
+"""CDT code search latency at catalog scale.
+
+Builds a synthetic catalog of ``--codes`` entries (up to the 10,000 codes in
+D0000-D9999; the real CDT catalog is licensed and not shipped) and times
+prefix and description queries against ``CodeCatalog.search``::
+
+    python -m benchmarks.bench_code_search --codes 1000 10000
+"""
+import argparse
+import json
+import random
+import time
+
+from .common import time_call
+
+WORDS = (
+    'resin composite amalgam crown porcelain ceramic metal implant abutment pontic retainer '
+    'extraction erupted impacted tooth root canal therapy anterior premolar molar surface '
+    'posterior primary permanent partial complete denture maxillary mandibular periodontal '
+    'scaling planing quadrant bone graft membrane sinus augmentation radiographic image '
+    'panoramic bitewing periapical sealant fluoride varnish prophylaxis adult child'
+).split()
+CATEGORIES = ['Diagnostic', 'Preventive', 'Restorative', 'Endodontics', 'Periodontics',
+              'Prosthodontics', 'Implant Services', 'Oral and Maxillofacial Surgery', 'Orthodontics']
+QUERIES = ['D7', 'D71', 'D2740', '27', 'crown', 'resin crown', 'porcelain cer', 'root canal molar', 'impl', 'zzz']
+
+
+def build_rows(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    for number in sorted(rng.sample(range(10000), min(count, 10000))):
+        yield {
+            'code': f"D{number:04d}",
+            'description': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 12))),
+            'category': rng.choice(CATEGORIES),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--codes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--json', dest='json_path', help='also write results to this file')
+    args = parser.parse_args()
+
+    from app.code_catalog import CodeCatalog
+
+    results = []
+    for count in args.codes:
+        rows = list(build_rows(count))
+        start = time.perf_counter()
+        catalog = CodeCatalog(rows)
+        build_ms = (time.perf_counter() - start) * 1000
+        print(f"{count:>8} codes  index built in {build_ms:.1f} ms ({len(catalog.vocabulary)} terms)")
+        queries = {}
+        for query in QUERIES:
+            timing = time_call(lambda: catalog.search(query, 20), args.repeat)
+            hits = len(catalog.search(query, 20))
+            queries[query] = {**timing, 'hits': hits}
+            print(f"    {query!r:<22} {hits:>3} hits  median {timing['median_ms']:.4f} ms  max {timing['max_ms']:.4f} ms")
+        results.append({'codes': count, 'build_ms': round(build_ms, 3), 'queries': queries})
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""GET /cases latency as a function of case count.
+
+Compares the original code path, where every case without a
+``workflow_stage`` parsed the whole single-file ``workflow_state.json``,
+against ``list_cases`` with a cold response cache (state shards read through
+a fresh index, then through a warm one), with every case already rendered,
+and as a conditional request answered with 304::
+
+    python -m benchmarks.bench_list_cases --sizes 100 500 1000 2000
+"""
+import argparse
+import json
+import time
+
+from .common import time_call, use_temp_data_dir
+
+
+def seed(workflow, count: int):
+    rows = []
+    states = {}
+    for i in range(count):
+        case_id = f"case_{i:08d}"
+        row = workflow.create_case_record(case_id, f"Bench case {i}", f"Patient {i}", 'Medicare', '2024-01-01T00:00:00+00:00')
+        # half the rows rely on the state file for their stage, like legacy rows
+        if i % 2:
+            row['workflow_stage'] = 'awaiting_case_details'
+        rows.append(row)
+        states[case_id] = {'stage': 'awaiting_procedure_documents', 'context': {'title': row['title']}}
+    workflow.write_cases(rows)
+    workflow._save_states(states)
+    # the same states in the pre-sharding format, for the legacy path
+    with open(legacy_state_file(workflow), 'w', encoding='utf-8') as f:
+        json.dump(states, f, indent=2)
+
+
+def legacy_state_file(workflow) -> str:
+    return workflow.WORKFLOW_STATE + '.bench'
+
+
+def legacy_list_cases(app_main, rows, state_file: str):
+    """GET /cases as originally served: each stage-less row loaded the whole state file."""
+    out = []
+    for row in rows[::-1]:
+        data = dict(row)
+        if not data.get('workflow_stage'):
+            with open(state_file, 'r', encoding='utf-8') as f:
+                data['workflow_stage'] = json.load(f).get(data['case_id'], {}).get('stage', 'awaiting_case_start')
+        out.append(app_main.case_row_to_response(data))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 500, 1000, 2000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-legacy-above', type=int, default=5000,
+                        help='skip the quadratic per-row path for larger sizes')
+    parser.add_argument('--json', dest='json_path', help='also write results to this file')
+    args = parser.parse_args()
+
+    use_temp_data_dir()
+    from fastapi.testclient import TestClient
+    from app import main as app_main, workflow
+
+    results = []
+    with TestClient(app_main.app) as client:
+        for size in args.sizes:
+            seed(workflow, size)
+            # state shards this fresh are never indexed; let them settle as they would in use
+            time.sleep(workflow._STATE_STORE.SETTLE_NS / 1e9)
+            etag = client.get('/cases').headers['etag']  # warm the case store and response cache
+
+            def cold(fresh_index: bool):
+                app_main._CASE_RESPONSES.clear()
+                if fresh_index:
+                    workflow._STATE_STORE._index.clear()
+                client.get('/cases').raise_for_status()
+
+            uncached_cold = time_call(lambda: cold(True), args.repeat)
+            uncached = time_call(lambda: cold(False), args.repeat)
+            cached = time_call(lambda: client.get('/cases').raise_for_status(), args.repeat)
+            not_modified = time_call(lambda: client.get('/cases', headers={'If-None-Match': etag}), args.repeat)
+            before = None
+            if size <= args.skip_legacy_above:
+                rows = workflow.load_cases()
+                before = time_call(lambda: legacy_list_cases(app_main, rows, legacy_state_file(workflow)), args.repeat)
+            results.append({'cases': size, 'legacy_single_file': before, 'uncached_cold_states': uncached_cold,
+                            'uncached': uncached, 'cached': cached, 'not_modified': not_modified})
+            legacy = f"{before['median_ms']:>10.1f}" if before else f"{'skipped':>10}"
+            print(f"{size:>8} cases  legacy {legacy} ms   uncached {uncached_cold['median_ms']:>8.1f} ms"
+                  f" (indexed states {uncached['median_ms']:>8.1f} ms)"
+                  f"   cached {cached['median_ms']:>8.1f} ms   304 {not_modified['median_ms']:>6.2f} ms")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Chat-completion throughput and latency against the local stand-in server.
+
+Starts ``benchmarks.llm_standin`` in a subprocess with ``--latency-ms`` of
+simulated model time and compares:
+
+- ``fresh_sequential`` / ``fresh_threads``: a new client (and connection pool)
+  per call, as ``get_openai_client`` used to build
+- ``pooled_sequential`` / ``pooled_threads``: ``openai_client.chat_completion``
+  on the shared client
+- ``async``: ``openai_client.achat_completion`` from as many coroutines on one loop
+
+``--concurrency`` sets the thread or coroutine count and ``LLM_MAX_CONCURRENCY``::
+
+    python -m benchmarks.bench_llm_client --calls 200 --concurrency 8 --latency-ms 50 [--json results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import BACKEND_DIR, latency_summary
+
+MESSAGES = [
+    {'role': 'system', 'content': 'You are a reimbursement copilot for oral surgery cases.'},
+    {'role': 'user', 'content': 'What is the status of D7471 and D7955?'},
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _start_standin(port: int, latency_ms: float) -> subprocess.Popen:
+    import httpx
+
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.llm_standin', '--port', str(port), '--latency-ms', str(latency_ms)],
+        cwd=BACKEND_DIR,
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f'http://127.0.0.1:{port}/stats', timeout=1).raise_for_status()
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("stand-in server did not start")
+
+
+def _timed_threads(fn, calls: int, threads: int) -> dict:
+    samples = []
+
+    def one(_):
+        t = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(calls)))
+    return latency_summary(samples, time.perf_counter() - started)
+
+
+def _timed_async(calls: int, concurrency: int) -> dict:
+    from app import openai_client
+
+    async def run():
+        samples = []
+        remaining = [calls]
+
+        async def worker():
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                t = time.perf_counter()
+                await openai_client.achat_completion(MESSAGES)
+                samples.append((time.perf_counter() - t) * 1000)
+
+        await openai_client.achat_completion(MESSAGES)  # open the first connection, like the sync warm-up
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        await openai_client.aclose_async_client()
+        return latency_summary(samples, elapsed)
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='simulated model latency of the stand-in')
+    parser.add_argument('--json', dest='json_path', help='also write results to this file')
+    args = parser.parse_args()
+
+    port = _free_port()
+    os.environ.update({
+        'OPENAI_API_KEY': 'standin',
+        'OPENAI_BASE_URL': f'http://127.0.0.1:{port}/v1',
+        'LLM_MAX_CONCURRENCY': str(args.concurrency),
+    })
+    for name in ('AZURE_OPENAI_API_KEY', 'AZURE_OPENAI_ENDPOINT', 'AZURE_OPENAI_DEPLOYMENT'):
+        os.environ.pop(name, None)
+    from openai import DefaultHttpxClient, OpenAI
+    from app import openai_client
+    from app.settings import settings
+
+    def fresh_call():
+        with OpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL, http_client=DefaultHttpxClient()) as client:
+            client.chat.completions.create(model=settings.OPENAI_MODEL, messages=MESSAGES)
+
+    def pooled_call():
+        openai_client.chat_completion(MESSAGES)
+
+    process = _start_standin(port, args.latency_ms)
+    try:
+        pooled_call()  # warm up the shared client and its first connection
+        sequential_calls = max(1, args.calls // args.concurrency)
+        results = {
+            'fresh_sequential': _timed_threads(fresh_call, sequential_calls, 1),
+            'pooled_sequential': _timed_threads(pooled_call, sequential_calls, 1),
+            'fresh_threads': _timed_threads(fresh_call, args.calls, args.concurrency),
+            'pooled_threads': _timed_threads(pooled_call, args.calls, args.concurrency),
+            'async': _timed_async(args.calls, args.concurrency),
+        }
+        openai_client.close_client()
+    finally:
+        process.terminate()
+        process.wait()
+
+    print(f"stand-in latency {args.latency_ms:.0f} ms, concurrency {args.concurrency}")
+    for name, timing in results.items():
+        overhead = timing['p50_ms'] - args.latency_ms
+        print(f"    {name:<18} {timing['count']:>5} calls  p50 {timing['p50_ms']:>8.2f} ms (+{overhead:.2f})"
+              f"  p99 {timing['p99_ms']:>8.2f} ms  {timing['per_second']:>8.1f} calls/s")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
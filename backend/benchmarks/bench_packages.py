@@ -0,0 +1,58 @@
+"""Month-end batch finalization throughput by package worker count.
+
+Seeds ``--cases`` cases and times ``workflow.build_final_packages`` (render
+the final package PDFs and summaries, then one batched documents.csv append)
+with each ``--workers`` setting. ``--note-repeat`` makes the package PDF
+longer to model heavier documents::
+
+    python -m benchmarks.bench_packages --cases 50 --workers 1 2 4
+"""
+import argparse
+import json
+import time
+
+from .common import use_temp_data_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', type=int, default=50)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--note-repeat', type=int, default=5)
+    parser.add_argument('--json', dest='json_path', help='also write results to this file')
+    args = parser.parse_args()
+
+    use_temp_data_dir()
+    from app import workflow
+    from app.packages import PackageBuilder
+
+    note = '\n\n'.join([workflow.SOAP_SAMPLE] * args.note_repeat)
+    make_artifacts = workflow._final_package_artifacts
+
+    def heavy_artifacts():
+        artifacts = make_artifacts()
+        artifacts['final_package'] = workflow._pdf_artifact('Deborah_McCormick_1500.pdf', note)
+        return artifacts
+
+    workflow._final_package_artifacts = heavy_artifacts
+    case_ids = workflow.import_cases([{'title': f'Bench case {i}'} for i in range(args.cases)])
+
+    results = []
+    for workers in args.workers:
+        workflow._PACKAGES = PackageBuilder(workflow.BLOBS_DIR, workers)
+        workflow.build_final_packages(case_ids[:1] * 2)  # start the pool outside the timing
+        start = time.perf_counter()
+        built = workflow.build_final_packages(case_ids)
+        elapsed = time.perf_counter() - start
+        workflow.shutdown_package_builder()
+        results.append({'workers': workers, 'cases': len(built), 'seconds': round(elapsed, 3),
+                        'cases_per_second': round(len(built) / elapsed, 1)})
+        print(f"{workers:>3} workers  {len(built)} cases in {elapsed:.2f}s  ({results[-1]['cases_per_second']} cases/s)")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Generated PDF throughput.
+
+Renders the SOAP note and CMS 1500 package PDFs that a completed case
+produces, streaming each into the blob store of a throwaway data directory,
+and reports packages, pages and bytes per second::
+
+    python -m benchmarks.bench_pdf --packages 200
+"""
+import argparse
+import json
+import time
+
+from .common import use_temp_data_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--packages', type=int, default=200)
+    parser.add_argument('--note-repeat', type=int, default=1,
+                        help='repeat the sample SOAP note this many times to simulate longer notes')
+    parser.add_argument('--json', dest='json_path', help='also write results to this file')
+    args = parser.parse_args()
+
+    data_dir = use_temp_data_dir()
+    from app import workflow
+    from app.blob_store import BlobStore
+    from app.pdf import write_text_pdf
+
+    blobs = BlobStore(workflow.BLOBS_DIR)
+    note = '\n\n'.join([workflow.SOAP_SAMPLE] * args.note_repeat)
+    pages = 0
+    size = 0
+    start = time.perf_counter()
+    for i in range(args.packages):
+        # a per-package header keeps every PDF distinct, so the blob store writes each one
+        for text in (f'Package {i}\n{note}', f'Package {i}\nCMS 1500 package ready for submission'):
+            counted = {}
+            _, written = blobs.put_stream(
+                lambda out: counted.setdefault('pages', write_text_pdf(out, text, workflow.SIGNATURE_LINES, workflow.SIGNATURE_RULE_Y))
+            )
+            pages += counted['pages']
+            size += written
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'packages': args.packages,
+        'pages': pages,
+        'bytes': size,
+        'seconds': round(elapsed, 3),
+        'packages_per_second': round(args.packages / elapsed, 1),
+        'pages_per_second': round(pages / elapsed, 1),
+        'mb_per_second': round(size / elapsed / 1e6, 2),
+        'data_dir': data_dir,
+    }
+    print(f"{args.packages} packages ({pages} pages, {size / 1e6:.1f} MB) in {elapsed:.2f}s: "
+          f"{result['packages_per_second']} packages/s, {result['pages_per_second']} pages/s")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Micro-benchmarks for the workflow hot paths on generated data directories.
+
+For each ``--sizes`` entry a fresh process generates that many cases with
+``benchmarks.dataset`` and times:
+
+- ``load_cases``: a cold parse of cases.csv by a new store, and a warm call
+- ``get_state``: one case's workflow state
+- ``record_message``: one chat message appended outside a unit of work
+- ``handle_user_message``: a chat turn in a unit of work, as ``/chat`` runs it,
+  for cases in every stage (with a message that does not advance the stage)
+
+::
+
+    python -m benchmarks.bench_workflow --sizes 1000 10000 [--json results.json]
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import time
+
+from .common import latency_summary, use_temp_data_dir
+
+
+def _timed(fn, calls):
+    samples = []
+    started = time.perf_counter()
+    for args in calls:
+        t = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - t) * 1000)
+    return latency_summary(samples, time.perf_counter() - started)
+
+
+def run_size(cases: int, calls: int, seed: int) -> dict:
+    use_temp_data_dir()
+    from . import dataset
+    from app import workflow
+    from app.case_store import CaseStore
+
+    generated = dataset.generate(cases, seed)
+    rng = random.Random(seed)
+    case_ids = [f"case_{i:08d}" for i in range(cases)]
+    sample = [(rng.choice(case_ids),) for _ in range(calls)]
+    results = {'cases': cases, 'messages': generated['messages'], 'documents': generated['documents'],
+               'generate_seconds': generated['seconds']}
+
+    def cold_load():
+        CaseStore(workflow.CASES_CSV, workflow.CASE_FIELD_ORDER, workflow.canonical_case_row).all()
+
+    results['load_cases_cold'] = _timed(cold_load, [()] * 5)
+    workflow.load_cases()
+    results['load_cases_warm'] = _timed(workflow.load_cases, [()] * 20)
+    results['get_state'] = _timed(workflow.get_state, sample)
+    results['record_message'] = _timed(
+        workflow.record_message, [(case_id, 'user', 'Benchmark message about D7471.') for case_id, in sample]
+    )
+
+    def chat_turn(case_id: str, content: str):
+        with workflow.unit_of_work(case_id):
+            workflow.record_message(case_id, 'user', content)
+            workflow.handle_user_message(case_id, content)
+
+    stages = list(workflow.STAGE_DEFAULTS)
+    per_stage = {}
+    for index, stage in enumerate(stages):
+        stage_ids = case_ids[index::len(stages)]
+        if not stage_ids:
+            continue
+        turns = [(rng.choice(stage_ids), 'hello, any update?') for _ in range(max(1, calls // len(stages)))]
+        per_stage[stage] = _timed(chat_turn, turns)
+    results['handle_user_message'] = per_stage
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--calls', type=int, default=500, help='calls per micro-benchmark')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', dest='json_path', help='also write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    # a process per size: the app binds DATA_DIR at import and caches what it reads
+    ctx = multiprocessing.get_context('spawn')
+    for size in args.sizes:
+        with ctx.Pool(1) as pool:
+            result = pool.apply(run_size, (size, args.calls, args.seed))
+        results.append(result)
+        print(f"{size:>8} cases  ({result['messages']} messages, {result['documents']} documents, generated in {result['generate_seconds']:.1f}s)")
+        for name in ('load_cases_cold', 'load_cases_warm', 'get_state', 'record_message'):
+            timing = result[name]
+            print(f"    {name:<22} p50 {timing['p50_ms']:>9.3f} ms  p99 {timing['p99_ms']:>9.3f} ms")
+        for stage, timing in result['handle_user_message'].items():
+            print(f"    chat {stage:<33} p50 {timing['p50_ms']:>9.3f} ms  p99 {timing['p99_ms']:>9.3f} ms")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway data directory. ``use_temp_data_dir`` must
+be called before anything under ``app`` is imported, because the app resolves
+its file paths from ``settings.DATA_DIR`` at import time.
+"""
+import math
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SEED_ADA_CODES = os.path.join(BACKEND_DIR, 'data', 'ada_codes.csv')
+
+
+def use_temp_data_dir(prefix: str = 'amdal-bench-') -> str:
+    path = tempfile.mkdtemp(prefix=prefix)
+    if os.path.exists(SEED_ADA_CODES):
+        shutil.copy(SEED_ADA_CODES, os.path.join(path, 'ada_codes.csv'))
+    os.environ['DATA_DIR'] = path
+    return path
+
+
+def time_call(fn: Callable[[], object], repeat: int = 5) -> Dict[str, float]:
+    """Run ``fn`` ``repeat`` times and summarize wall-clock latency in milliseconds."""
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        'min_ms': round(min(samples), 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'max_ms': round(max(samples), 3),
+    }
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def latency_summary(samples_ms: List[float], seconds: float = 0.0) -> Dict[str, float]:
+    """p50/p90/p99 latency of per-call samples in milliseconds, plus throughput over ``seconds`` of wall time."""
+    ordered = sorted(samples_ms)
+    summary = {
+        'count': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered), 3) if ordered else 0.0,
+        'p50_ms': round(percentile(ordered, 50), 3),
+        'p90_ms': round(percentile(ordered, 90), 3),
+        'p99_ms': round(percentile(ordered, 99), 3),
+        'max_ms': round(ordered[-1], 3) if ordered else 0.0,
+    }
+    if seconds:
+        summary['per_second'] = round(len(ordered) / seconds, 1)
+    return summary
@@ -0,0 +1,197 @@
+"""Synthetic data directory generator for benchmarks and load tests.
+
+Fills ``DATA_DIR`` with ``--cases`` cases spread evenly over every workflow
+stage in ``STAGE_DEFAULTS``. Each case gets the messages, document rows and
+workflow context it would have collected on its way to that stage, so later
+stages carry longer chat histories and more documents. One in ten case rows
+is left without a ``workflow_stage``, like legacy rows, so reads exercise the
+state lookup. Document bytes are a handful of shared blobs; ``--link-uploads``
+also links them into ``uploads/`` (slow for large sizes)::
+
+    python -m benchmarks.dataset --cases 10000 [--data-dir PATH]
+
+Without ``--data-dir`` a throwaway directory is used and printed. Other
+benchmarks call ``generate`` after ``use_temp_data_dir``.
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import random
+import time
+from typing import Dict, List
+
+from .common import use_temp_data_dir
+
+USER_LINES = [
+    "Let's start a new case for this patient.",
+    "Uploading the intake form now.",
+    "Here are the clinical notes with the CDT codes.",
+    "Option 1, I'll get the MD documentation.",
+    "Is there anything else you need from me?",
+    "Yes, proceed with the RCM recommendation.",
+    "Please prepare the SOAP note.",
+    "Signed copy attached.",
+    "Please submit.",
+    "What is the status of D7471 and D7955?",
+]
+ASSISTANT_LINES = [
+    "Perfect—let's get the case set up. Please share the case ID, patient demographics, and payer information.",
+    "Patient information has been loaded into the dashboard. I'll start with a Medicare eligibility check now.",
+    "Thanks for the notes. I've converted the ADA CDT codes to CPT and applied the Medicare policy rules.",
+    "Two items need attention before we finalize: D7471 may lack supporting documentation and D7955 might be a duplicate.",
+    "Routing the case to Mila from the RCM team to confirm the duplicate alert. I'll update you as soon as I hear back.",
+    "Based on the documentation and RCM feedback, the projected reimbursement is $4,820.00 with an expected payment window of 14-21 days.",
+    "I've generated the SOAP note for Dr. review. Download it from the documents panel, get it signed, and upload the signed version.",
+    "I've generated the full reimbursement package including the CMS 1500/837 output.",
+]
+PAYERS = ['Medicare CA - Southern California', 'Medicare Part B', 'Delta Dental', 'Aetna', 'Cigna', 'MetLife', '']
+FIRST_NAMES = ['Deborah', 'James', 'Maria', 'Robert', 'Linda', 'Michael', 'Patricia', 'David', 'Susan', 'Wei']
+LAST_NAMES = ['McCormick', 'Nguyen', 'Garcia', 'Smith', 'Johnson', 'Khan', 'Lee', 'Brown', 'Martinez', 'Wang']
+
+# (first stage index that has the document, context key, file name, doc type, blob kind)
+DOCUMENTS = [
+    (2, 'patient_info', 'patient_intake.pdf', 'application/pdf', 'intake'),
+    (3, 'clinical_notes', 'clinical_notes.txt', 'text/plain', 'notes'),
+    (5, 'additional_md', 'operative_note.pdf', 'application/pdf', 'operative'),
+    (8, 'soap_note', 'Deborah SOAP Note for Dr Review.txt', 'generated-soap', 'soap'),
+    (8, 'soap_note_pdf', 'Deborah SOAP Note for Dr Review.pdf', 'generated-pdf', 'soap_pdf'),
+    (9, 'signed_soap', 'signed_soap_note.pdf', 'application/pdf', 'signed'),
+    (9, 'final_package', 'Deborah_McCormick_1500.pdf', 'generated-pdf', 'package'),
+    (9, 'final_summary', 'Deborah SOAP Note for Dr Review - Final Package.txt', 'generated-summary', 'summary'),
+]
+
+
+def _blob_payloads(workflow, rng: random.Random) -> Dict[str, bytes]:
+    def filler(size: int) -> bytes:
+        return bytes(rng.getrandbits(8) for _ in range(size))
+
+    return {
+        'intake': b'%PDF-1.4\n' + filler(24 * 1024),
+        'notes': workflow.SOAP_SAMPLE.encode('utf-8'),
+        'operative': b'%PDF-1.4\n' + filler(48 * 1024),
+        'soap': workflow.SOAP_SAMPLE.encode('utf-8') + b'\n',
+        'soap_pdf': b'%PDF-1.4\n' + filler(16 * 1024),
+        'signed': b'%PDF-1.4\n' + filler(64 * 1024),
+        'package': b'%PDF-1.4\n' + filler(8 * 1024),
+        'summary': b'Final package includes: Signed SOAP note, Operative note, CMS 1500/837I summary.',
+    }
+
+
+def _context(workflow, title: str, index: int, documents: Dict[str, str]) -> Dict:
+    return {
+        'title': title,
+        'eligibility': workflow._simulate_eligibility('') if index >= 2 else None,
+        'conversion': workflow._simulate_conversion() if index >= 3 else None,
+        'issues': {'insufficient_documentation': index < 5, 'duplicate': index < 6},
+        'documents': documents,
+        'rcm_review': workflow._simulate_rcm_response() if index >= 6 else None,
+        'reimbursement': workflow._simulate_reimbursement_forecast() if index >= 7 else None,
+    }
+
+
+def generate(cases: int, seed: int = 7, extra_messages: int = 4, link_uploads: bool = False, chunk: int = 5000) -> Dict:
+    """Write ``cases`` synthetic cases into the current ``DATA_DIR``; returns counts and timings."""
+    from app import migrations, workflow
+    from app.utils import append_csv_rows
+
+    started = time.perf_counter()
+    migrations.run_migrations()
+    rng = random.Random(seed)
+    stages = list(workflow.STAGE_DEFAULTS)
+    blobs = {kind: workflow._BLOB_STORE.put_bytes(data) for kind, data in _blob_payloads(workflow, rng).items()}
+    # leave room after the newest case for its chat history to stay in the past
+    epoch = dt.datetime.now().astimezone() - dt.timedelta(days=125)
+    step = dt.timedelta(days=120) / max(cases, 1)
+
+    rows: List[Dict[str, str]] = []
+    totals = {'messages': 0, 'documents': 0}
+    stage_counts = {stage: 0 for stage in stages}
+    for start in range(0, cases, chunk):
+        states: Dict[str, Dict] = {}
+        messages: List[Dict] = []
+        documents: List[Dict] = []
+        for i in range(start, min(start + chunk, cases)):
+            case_id = f"case_{i:08d}"
+            index = i % len(stages)
+            stage = stages[index]
+            stage_counts[stage] += 1
+            created = epoch + step * i
+            clock = [created]
+
+            def tick() -> str:
+                clock[0] += dt.timedelta(minutes=rng.randint(1, 90))
+                return clock[0].isoformat()
+
+            title = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} - {rng.choice(['Oral surgery', 'Implant', 'Extraction', 'Bone graft'])}"
+            row = workflow.create_case_record(case_id, title, title.split(' - ')[0], rng.choice(PAYERS), created.isoformat())
+            defaults = workflow.STAGE_DEFAULTS[stage]
+            row.update({'status': defaults['status'], 'workflow_stage': stage,
+                        'workflow_status': defaults['workflow_status'], 'next_action': defaults['next_action']})
+            if index >= 7:
+                row.update({'reimbursement_amount': '4820.0', 'reimbursement_date': '14-21 days (projected)', 'risk_level': 'Low'})
+            if i % 10 == 9:
+                row['workflow_stage'] = ''  # legacy row: the stage comes from the state file
+
+            messages.append({'msg_id': f"msg_{i:08d}_000", 'case_id': case_id, 'role': 'assistant',
+                             'content': "Hi there! I'm your reimbursement copilot.", 'created_at': tick()})
+            for n in range(2 * index + rng.randint(0, extra_messages)):
+                role = 'user' if n % 2 == 0 else ('system' if n % 7 == 5 else 'assistant')
+                content = rng.choice(USER_LINES if role == 'user' else ASSISTANT_LINES)
+                messages.append({'msg_id': f"msg_{i:08d}_{n + 1:03d}", 'case_id': case_id, 'role': role,
+                                 'content': content, 'created_at': tick()})
+
+            doc_ids: Dict[str, str] = {}
+            for first_index, key, name, doc_type, kind in DOCUMENTS:
+                if index < first_index:
+                    continue
+                sha256, size = blobs[kind]
+                doc_id = f"doc_{i:08d}_{len(doc_ids):02d}"
+                path = os.path.join(workflow.UPLOADS_DIR, case_id, name)
+                if link_uploads:
+                    workflow._BLOB_STORE.link(sha256, path)
+                documents.append({'doc_id': doc_id, 'case_id': case_id, 'name': name, 'type': doc_type, 'path': path,
+                                  'public_url': f"/uploads/{case_id}/{name}", 'uploaded_at': tick(),
+                                  'sha256': sha256, 'size': str(size)})
+                doc_ids[key] = doc_id
+
+            row['updated_at'] = clock[0].isoformat()
+            rows.append(row)
+            states[case_id] = {'stage': stage, 'context': _context(workflow, title, index, doc_ids)}
+
+        workflow._save_states(states)
+        workflow._MESSAGE_LOG.append(messages)
+        append_csv_rows(workflow.DOCS_CSV, documents, workflow.DOCUMENT_FIELD_ORDER)
+        totals['messages'] += len(messages)
+        totals['documents'] += len(documents)
+
+    workflow.write_cases(rows)
+    return {
+        'data_dir': os.path.dirname(workflow.CASES_CSV),
+        'cases': cases,
+        **totals,
+        'stages': stage_counts,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--extra-messages', type=int, default=4, help='up to this many extra chat messages per case')
+    parser.add_argument('--link-uploads', action='store_true', help='also hard-link document files under uploads/')
+    parser.add_argument('--data-dir', help='fill this directory instead of a temporary one (it should be empty)')
+    args = parser.parse_args()
+
+    if args.data_dir:
+        os.makedirs(args.data_dir, exist_ok=True)
+        os.environ['DATA_DIR'] = os.path.abspath(args.data_dir)
+    else:
+        use_temp_data_dir()
+    summary = generate(args.cases, args.seed, args.extra_messages, args.link_uploads)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Local stand-in for the OpenAI chat-completions API.
+
+Answers ``POST /v1/chat/completions`` (and the Azure
+``/openai/deployments/{deployment}/chat/completions`` path) after a simulated
+model latency, with a canned reply and rough token counts, so the LLM client
+can be exercised and benchmarked offline. ``stream: true`` is answered with
+server-sent chunks like the real API. Authentication is not checked::
+
+    python -m benchmarks.llm_standin --port 8900 --latency-ms 200 --jitter-ms 50
+    OPENAI_API_KEY=standin OPENAI_BASE_URL=http://127.0.0.1:8900/v1 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Dict, List
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+REPLY = ("Thanks for the update. I've reviewed the documentation for D7471 and D7955; "
+         "the case is ready for the next step.")
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def create_app(latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 7) -> FastAPI:
+    app = FastAPI(title="Chat completions stand-in")
+    rng = random.Random(seed)
+    stats = {'requests': 0}
+
+    async def completions(request: Request, model: str):
+        body = await request.json()
+        messages: List[Dict] = body.get('messages') or []
+        if not messages:
+            raise HTTPException(status_code=400, detail="messages must be a non-empty list")
+        stats['requests'] += 1
+        delay = max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        prompt_tokens = sum(_tokens(str(m.get('content') or '')) for m in messages)
+        if body.get('stream'):
+            async def chunks():
+                words = REPLY.split(' ')
+                for i, word in enumerate(words):
+                    delta = {'content': word if i == 0 else ' ' + word}
+                    if i == 0:
+                        delta['role'] = 'assistant'
+                    yield 'data: ' + json.dumps({
+                        'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                        'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}],
+                    }) + '\n\n'
+                yield 'data: ' + json.dumps({
+                    'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                    'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}],
+                }) + '\n\n'
+                yield 'data: [DONE]\n\n'
+            return StreamingResponse(chunks(), media_type='text/event-stream')
+
+        return JSONResponse({
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': created,
+            'model': model,
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': REPLY}, 'logprobs': None, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': _tokens(REPLY),
+                      'total_tokens': prompt_tokens + _tokens(REPLY)},
+        })
+
+    @app.post('/v1/chat/completions')
+    async def openai_completions(request: Request):
+        body = await request.json()
+        return await completions(request, body.get('model') or 'gpt-4o-mini')
+
+    @app.post('/openai/deployments/{deployment}/chat/completions')
+    async def azure_completions(deployment: str, request: Request):
+        return await completions(request, deployment)
+
+    @app.get('/stats')
+    def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency-ms', type=float, default=200.0, help='simulated model latency per call')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='latency varies uniformly by up to this much')
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms, args.jitter_ms), host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
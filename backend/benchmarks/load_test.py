@@ -0,0 +1,116 @@
+"""In-process HTTP load driver for the main endpoints.
+
+Generates ``--cases`` cases with ``benchmarks.dataset``, then runs each
+scenario against the app through ``TestClient`` from ``--threads`` threads
+for ``--requests`` requests, one scenario at a time:
+
+- ``cases_page``: ``GET /cases?limit=50``
+- ``cases_full``: ``GET /cases``
+- ``case``: ``GET /cases/{case_id}``
+- ``messages``: ``GET /cases/{case_id}/messages``
+- ``chat``: ``POST /cases/{case_id}/chat``
+- ``upload``: ``POST /cases/{case_id}/documents`` with a small file
+
+Latency percentiles and throughput per scenario go to ``--output`` as JSON
+with stable key order, so two runs can be diffed::
+
+    python -m benchmarks.load_test --cases 10000 --threads 8 --requests 400 --output before.json
+"""
+import argparse
+import json
+import platform
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import latency_summary, use_temp_data_dir
+
+SCENARIOS = ['cases_page', 'cases_full', 'case', 'messages', 'chat', 'upload']
+
+
+def _request(client, scenario: str, case_id: str, n: int):
+    if scenario == 'cases_page':
+        return client.get('/cases', params={'limit': 50})
+    if scenario == 'cases_full':
+        return client.get('/cases')
+    if scenario == 'case':
+        return client.get(f'/cases/{case_id}')
+    if scenario == 'messages':
+        return client.get(f'/cases/{case_id}/messages')
+    if scenario == 'chat':
+        return client.post(f'/cases/{case_id}/chat', json={'content': f'hello, any update on D7471? ({n})'})
+    if scenario == 'upload':
+        return client.post(f'/cases/{case_id}/documents', files={'file': (f'note_{n}.txt', b'Operative note\n' * 64, 'text/plain')})
+    raise ValueError(f"unknown scenario {scenario!r}")
+
+
+def run_scenario(client, scenario: str, case_ids, threads: int, requests: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    plan = [(rng.choice(case_ids), n) for n in range(requests)]
+    samples = []
+    errors = []
+    lock = threading.Lock()
+
+    def one(item):
+        case_id, n = item
+        started = time.perf_counter()
+        response = _request(client, scenario, case_id, n)
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            samples.append(elapsed)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, plan))
+    summary = latency_summary(samples, time.perf_counter() - started)
+    summary['errors'] = len(errors)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400, help='requests per scenario')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default='load_test_results.json')
+    args = parser.parse_args()
+
+    use_temp_data_dir()
+    from fastapi.testclient import TestClient
+    from . import dataset
+    from app import jobs
+    from app.main import app
+
+    generated = dataset.generate(args.cases, args.seed)
+    case_ids = [f"case_{i:08d}" for i in range(args.cases)]
+    print(f"{args.cases} cases, {generated['messages']} messages, {generated['documents']} documents "
+          f"(generated in {generated['seconds']:.1f}s)")
+
+    scenarios = {}
+    with TestClient(app) as client:
+        client.get('/cases')  # warm the case store
+        for scenario in args.scenarios:
+            scenarios[scenario] = run_scenario(client, scenario, case_ids, args.threads, args.requests, args.seed)
+            timing = scenarios[scenario]
+            print(f"    {scenario:<12} p50 {timing['p50_ms']:>9.2f} ms  p99 {timing['p99_ms']:>9.2f} ms"
+                  f"  {timing['per_second']:>8.1f} req/s  {timing['errors']} errors")
+        jobs.shutdown()  # let queued upload jobs finish before the data directory is abandoned
+
+    results = {
+        'config': {'cases': args.cases, 'threads': args.threads, 'requests': args.requests, 'seed': args.seed},
+        'dataset': {key: generated[key] for key in ('messages', 'documents')},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'scenarios': scenarios,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
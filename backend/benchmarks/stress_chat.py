@@ -0,0 +1,120 @@
+"""Hammer POST /cases/{id}/chat from many processes sharing one data directory.
+
+Every worker process runs its own copy of the app (as uvicorn workers would)
+with several request threads each. Afterwards the data directory is checked
+for lost or duplicated messages, unreadable state files and a messages.csv
+index that disagrees with a full rebuild::
+
+    python -m benchmarks.stress_chat --processes 4 --threads 4 --messages 25 --cases 3
+
+Exits non-zero if any check fails.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import use_temp_data_dir
+
+
+def _worker(proc: int, case_ids, threads: int, messages: int) -> int:
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    def run_thread(thread: int) -> int:
+        failures = 0
+        for i in range(messages):
+            case_id = case_ids[(proc + thread + i) % len(case_ids)]
+            # every other message starts the case so the stage actually changes under contention
+            word = 'start' if i % 2 else 'hello'
+            r = client.post(f'/cases/{case_id}/chat', json={'content': f'{word} p{proc} t{thread} n{i}'})
+            if r.status_code != 200:
+                failures += 1
+        return failures
+
+    with TestClient(app) as client:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            return sum(pool.map(run_thread, range(threads)))
+
+
+def _check(data_dir: str, case_ids, expected_users) -> list:
+    from app import workflow
+    from app.case_log import CaseLog
+
+    problems = []
+    with open(os.path.join(data_dir, 'messages.csv'), newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    users = [r['content'] for r in rows if r['role'] == 'user']
+    if sorted(users) != sorted(expected_users):
+        missing = set(expected_users) - set(users)
+        problems.append(f"user messages: expected {len(expected_users)}, found {len(users)} ({len(missing)} missing)")
+    assistants = [r for r in rows if r['role'] == 'assistant']
+    # one greeting per case plus exactly one reply per chat turn
+    if len(assistants) != len(case_ids) + len(expected_users):
+        problems.append(f"assistant messages: expected {len(case_ids) + len(expected_users)}, found {len(assistants)}")
+
+    indexed = {case_id: workflow.list_messages(case_id) for case_id in case_ids}
+    os.remove(workflow.MSGS_CSV + '.idx')
+    rebuilt = CaseLog(workflow.MSGS_CSV, workflow.MESSAGE_FIELD_ORDER)
+    for case_id in case_ids:
+        if rebuilt.for_case(case_id) != indexed[case_id]:
+            problems.append(f"messages.csv.idx disagrees with a rebuild for {case_id}")
+
+    for case_id in case_ids:
+        path = os.path.join(workflow.WORKFLOW_STATE_DIR, f'{case_id}.json')
+        try:
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('stage') not in workflow.STAGE_DEFAULTS:
+                problems.append(f"{case_id}: unexpected stage {state.get('stage')!r}")
+        except (OSError, json.JSONDecodeError) as exc:
+            problems.append(f"{case_id}: unreadable state ({exc})")
+        row = workflow.get_case_row(case_id)
+        if row is None:
+            problems.append(f"{case_id}: missing from cases.csv")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--messages', type=int, default=25, help='chat turns per thread')
+    parser.add_argument('--cases', type=int, default=3)
+    args = parser.parse_args()
+
+    data_dir = use_temp_data_dir('amdal-stress-')
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        case_ids = [client.post('/cases', json={'title': f'Stress {i}'}).json()['case_id'] for i in range(args.cases)]
+
+    ctx = multiprocessing.get_context('spawn')
+    start = time.perf_counter()
+    with ctx.Pool(args.processes) as pool:
+        failures = sum(pool.starmap(_worker, [(p, case_ids, args.threads, args.messages) for p in range(args.processes)]))
+    elapsed = time.perf_counter() - start
+
+    expected = [
+        f"{'start' if i % 2 else 'hello'} p{p} t{t} n{i}"
+        for p in range(args.processes) for t in range(args.threads) for i in range(args.messages)
+    ]
+    print(f"{len(expected)} chat turns from {args.processes} processes x {args.threads} threads in {elapsed:.1f}s "
+          f"({len(expected) / elapsed:.0f} turns/s), {failures} failed requests")
+    problems = _check(data_dir, case_ids, expected)
+    if failures:
+        problems.append(f"{failures} requests did not return 200")
+    for problem in problems:
+        print("FAIL:", problem)
+    if problems:
+        sys.exit(1)
+    print(f"OK: no lost messages or state in {data_dir}")
+
+
+if __name__ == '__main__':
+    main()